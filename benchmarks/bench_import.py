@@ -0,0 +1,90 @@
+"""
+Benchmarks the time it takes to import the parser in a fresh interpreter.
+
+    python benchmarks/bench_import.py [--runs N] [--module norsourceparser.core.parser] [PATH ...]
+
+Every PATH is a checkout of the repository to time, defaulting to the one containing this script, so a revision
+can be compared with another one checked out with `git worktree add`. The checkouts are timed in turns, so a
+machine getting slower or faster during the benchmark affects all of them alike.
+
+Two times are reported: the cumulative import time of the module, as reported by `python -X importtime`, and the
+wall time of `norsourceparser --help`, which imports the frontend and builds the command line.
+"""
+import os
+import sys
+import argparse
+import subprocess
+import timeit
+
+REPOSITORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def get_environment(path):
+    environment = dict(os.environ, PYTHONPATH=path)
+    # Without bytecode, every run would compile the changed modules from source
+    environment.pop('PYTHONDONTWRITEBYTECODE', None)
+    return environment
+
+
+def time_import(path, module):
+    """
+    Imports a module in a fresh interpreter.
+
+    :return: The cumulative import time of the module in seconds
+    """
+    output = subprocess.check_output([sys.executable, '-X', 'importtime', '-c', 'import %s' % module],
+                                     env=get_environment(path), cwd=path, stderr=subprocess.STDOUT)
+    for line in output.decode('utf-8').splitlines():
+        columns = line.split('|')
+        if len(columns) == 3 and columns[2].strip() == module:
+            return int(columns[1]) / 1e6
+    raise ValueError("%s was not imported" % module)
+
+
+def time_help(path):
+    """
+    Runs `norsourceparser --help` in a fresh interpreter.
+
+    :return: The wall time in seconds
+    """
+    command = [sys.executable, '-c', 'from norsourceparser.frontend import main; main()', '--help']
+    start = timeit.default_timer()
+    subprocess.check_call(command, env=get_environment(path), cwd=path, stdout=subprocess.DEVNULL)
+    return timeit.default_timer() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times importing the parser")
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--module', default='norsourceparser.core.parser')
+    parser.add_argument('paths', nargs='*', default=[REPOSITORY_DIR])
+    args = parser.parse_args(argv)
+    paths = [os.path.abspath(path) for path in args.paths]
+
+    # Warm up the file system cache, and write the bytecode
+    for path in paths:
+        time_import(path, args.module)
+        time_help(path)
+
+    imports = dict((path, []) for path in paths)
+    helps = dict((path, []) for path in paths)
+    for _ in range(args.runs):
+        for path in paths:
+            imports[path].append(time_import(path, args.module))
+            helps[path].append(time_help(path))
+
+    print("%-40s %12s %12s %12s %12s" % ("checkout", "import min", "median (ms)", "--help min", "median (ms)"))
+    for path in paths:
+        times = sorted(imports[path])
+        help_times = sorted(helps[path])
+        print("%-40s %12.1f %12.1f %12.1f %12.1f" % (
+            path[-40:],
+            1000 * times[0],
+            1000 * times[len(times) // 2],
+            1000 * help_times[0],
+            1000 * help_times[len(help_times) // 2],
+        ))
+
+
+if __name__ == '__main__':
+    main()
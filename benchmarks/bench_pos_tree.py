@@ -0,0 +1,54 @@
+"""
+Benchmarks the posTree tokenizer against the regular expression it replaced, on sentences of growing length.
+Times are per sentence, with the time per extracted leaf in parentheses.
+
+    python benchmarks/bench_pos_tree.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from norsourceparser.core.models import pos_tree_pattern, tokenize_pos_tree  # noqa: E402
+
+LEAVES = ['("PN" ("Dette"))', '("V" ("V" ("var")))', '("N" ("N" ("N" ("gøy"))))', '("PUNCT" (","))',
+          '("N" ("sms-en"))']
+
+
+def make_pos_tree(words):
+    leaves = [LEAVES[i % len(LEAVES)] for i in range(words)]
+    return '("S" ("S" %s) ("PUNCT" (".")))' % " ".join(leaves)
+
+
+def time_per_call(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def main(number=2000):
+    """
+    Prints the time per sentence of both the regex and the tokenizer, which is what a conversion pays for every
+    posTree. The time per extracted leaf is only given for reference: The regex drops every leaf with punctuation or
+    hyphens, which the tokenizer has to extract, so the two do not extract the same number of leaves.
+    """
+    print("%8s %10s %10s %14s %14s" % ("words", "regex #", "tokens #", "regex (us)", "tokenizer (us)"))
+    for words in [10, 100, 1000, 10000]:
+        pos_tree = make_pos_tree(words)
+        repeat = max(1, number // words)
+        regex_leaves = len(re.findall(pos_tree_pattern, pos_tree, re.UNICODE))
+        tokenizer_leaves = len(tokenize_pos_tree(pos_tree))
+
+        regex = time_per_call(lambda: re.findall(pos_tree_pattern, pos_tree, re.UNICODE), repeat)
+        tokenizer = time_per_call(lambda: tokenize_pos_tree(pos_tree), repeat)
+        print("%8d %10d %10d %14s %14s" % (
+            words,
+            regex_leaves,
+            tokenizer_leaves,
+            "%.1f (%.3f)" % (1e6 * regex, 1e6 * regex / regex_leaves),
+            "%.1f (%.3f)" % (1e6 * tokenizer, 1e6 * tokenizer / tokenizer_leaves),
+        ))
+
+
+if __name__ == '__main__':
+    main()
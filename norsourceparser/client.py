@@ -0,0 +1,114 @@
+"""
+A thin client for the conversion daemon started with `norsourceparser serve`.
+
+The client only depends on the standard library, and deliberately does not import the parser, so converting a
+document costs little more than a round-trip to the daemon.
+
+    norsourceparser-client [--socket PATH | --host HOST --port PORT] [--mode standard|pos] INPUT OUTPUT
+"""
+import sys
+import socket
+import argparse
+
+from http.client import HTTPConnection
+from urllib.parse import urlencode
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class ConversionError(Exception):
+    pass
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """
+    An HTTPConnection talking to a Unix socket.
+    """
+
+    def __init__(self, socket_path, timeout=None):
+        HTTPConnection.__init__(self, 'localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def convert(document, mode='standard', max_phrases_per_text=-1, host=DEFAULT_HOST, port=DEFAULT_PORT,
+            socket_path=None, timeout=None):
+    """
+    Sends a Norsource document to the daemon, and returns the converted TC-XML.
+
+    :param document: The Norsource document as bytes
+    :param mode: Either 'standard' or 'pos'
+    :param max_phrases_per_text:
+    :param host: The host of the daemon
+    :param port: The port of the daemon
+    :param socket_path: If given, we connect to the daemon on this Unix socket instead of on host:port
+    :param timeout: A socket timeout in seconds
+    :return: The TC-XML document as bytes
+    """
+    if socket_path is not None:
+        connection = UnixHTTPConnection(socket_path, timeout=timeout)
+    else:
+        connection = HTTPConnection(host, port, timeout=timeout)
+
+    try:
+        query = urlencode({'mode': mode, 'max_phrases_per_text': max_phrases_per_text})
+        connection.request('POST', '/convert?' + query, document, {'Content-Type': 'application/xml'})
+        response = connection.getresponse()
+        body = response.read()
+    finally:
+        connection.close()
+
+    if response.status != 200:
+        raise ConversionError(body.decode('utf-8', 'replace'))
+    return body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converts a Norsource file using a running norsourceparser daemon")
+    parser.add_argument('--socket', dest='socket_path', default=None, help='Unix socket of the daemon')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--mode', default='standard', choices=['standard', 'pos'])
+    parser.add_argument('--max-phrases-per-text', type=int, default=-1)
+    parser.add_argument('input', help="Norsource file, or - for stdin")
+    parser.add_argument('output', help="TC-XML file, or - for stdout")
+    args = parser.parse_args(argv)
+
+    stdin = getattr(sys.stdin, 'buffer', sys.stdin)
+    stdout = getattr(sys.stdout, 'buffer', sys.stdout)
+
+    if args.input == '-':
+        document = stdin.read()
+    else:
+        with open(args.input, 'rb') as fp:
+            document = fp.read()
+
+    try:
+        result = convert(
+            document,
+            mode=args.mode,
+            max_phrases_per_text=args.max_phrases_per_text,
+            host=args.host,
+            port=args.port,
+            socket_path=args.socket_path
+        )
+    except (ConversionError, socket.error) as e:
+        sys.stderr.write("%s\n" % e)
+        return 1
+
+    if args.output == '-':
+        stdout.write(result)
+    else:
+        with open(args.output, 'wb') as fp:
+            fp.write(result)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+This file contains an asyncio API for the parser, for embedding the conversion in async services.
+
+All XML reading and resolve/reduce/convert work is run in executors, so a large document never blocks the event
+loop. It lives in its own module, so importing the parser does not pull in asyncio.
+"""
+import asyncio
+from collections import deque
+
+from norsourceparser.core.parser import Parser, iter_parse_records
+
+# The number of phrases converted ahead of the consumer in AsyncParser.aiter_phrases
+AIO_PREFETCH = 4
+
+
+class AsyncParser(object):
+
+    @staticmethod
+    async def aparse(norsource="", executor=None):
+        """
+        Parses a Norsource XML represented as a string into Typecraft Texts, without blocking the event loop.
+
+        :param (String) norsource: A Norsource file as a string
+        :param executor: The concurrent.futures executor to run the conversion in. Defaults to the loop executor
+        :return: A list of Typecraft Texts
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(executor, Parser.parse, norsource)
+
+    @staticmethod
+    async def aparse_file(filename, executor=None):
+        """
+        Parses a Norsource XML file into Typecraft Texts, without blocking the event loop.
+
+        :param filename: A file path (or file object) to a norsource file
+        :param executor: The concurrent.futures executor to convert the sentences in
+        :return: A list of Typecraft Texts
+        """
+        phrases = []
+        async for phrase in AsyncParser.aiter_phrases(filename, executor=executor):
+            phrases.append(phrase)
+        return Parser.create_texts(phrases)
+
+    @staticmethod
+    async def aiter_phrases(filename, executor=None, prefetch=AIO_PREFETCH):
+        """
+        Streams a Norsource XML file, asynchronously yielding a Typecraft Phrase for every <parse> element.
+
+        The XML is read in the default executor of the loop, while every sentence is resolved, reduced and converted
+        in `executor`, which may be a ProcessPoolExecutor to take the work off the interpreter entirely. At most
+        `prefetch` sentences are read and converted ahead of the consumer, so a slow consumer applies backpressure
+        all the way down to the file.
+
+        :param filename: A file path (or file object) to a norsource file
+        :param executor: The concurrent.futures executor to convert the sentences in. Defaults to the loop executor
+        :param prefetch: The number of sentences converted ahead of the consumer
+        :return: An async generator of Typecraft Phrases
+        """
+        loop = asyncio.get_event_loop()
+        records = iter_parse_records(filename)
+        pending = deque()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < max(1, prefetch):
+                    record = await loop.run_in_executor(None, next, records, None)
+                    if record is None:
+                        exhausted = True
+                        break
+                    pending.append(loop.run_in_executor(executor, Parser.convert_record, record))
+
+                if len(pending) == 0:
+                    break
+
+                phrase = await pending.popleft()
+                if phrase is not None:
+                    yield phrase
+        finally:
+            for future in pending:
+                future.cancel()
+            try:
+                records.close()
+            except ValueError:
+                # We were cancelled while the reader thread was still inside the generator
+                pass
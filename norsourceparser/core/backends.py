@@ -0,0 +1,326 @@
+"""
+This file contains the XML backends used to read Norsource files.
+
+Every backend turns a Norsource file into a stream of ParseRecords, one for every <parse> element. The
+ElementTree and lxml backends do so by streaming the document with iterparse, while the expat backend builds the
+SyntaxNodes straight from SAX events without ever constructing a DOM.
+"""
+import xml.etree.ElementTree as ET
+
+from norsourceparser.core.config import config
+from norsourceparser.core.models import UnresolvedSyntaxTree, SyntaxNode
+from norsourceparser.core.names import intern_name
+
+
+NORSOURCE_ROOT_TAG = 'parse'
+NORSOURCE_INPUT_TAG = 'input'
+NORSOURCE_POSTREE_TAG = 'posTree'
+NORSOURCE_SYNTAXTREE_TAG = 'syntax-tree'
+NORSOURCE_NODE_TAGS = ['terminal', 'node']
+
+XML_BACKEND_ETREE = 'etree'
+XML_BACKEND_LXML = 'lxml'
+XML_BACKEND_EXPAT = 'expat'
+XML_BACKENDS = [XML_BACKEND_ETREE, XML_BACKEND_LXML, XML_BACKEND_EXPAT]
+
+# The number of bytes fed to the expat parser at a time
+EXPAT_CHUNK_SIZE = 64 * 1024
+
+
+class ParseRecord(object):
+    """
+    The contents of a single <parse> element we care about: The input sentence, the posTree string and the
+    UnresolvedSyntaxTree. Each of them is None if the element is missing.
+    """
+
+    def __init__(self, input=None, pos_tree=None, syntax_tree=None):
+        self.input = input
+        self.pos_tree = pos_tree
+        self.syntax_tree = syntax_tree
+
+
+def create_syntax_node(tag, attributes):
+    """
+    Creates a SyntaxNode from the tag and attributes of a <terminal> or <node> element. The names of <node> elements
+    are interned, so every occurrence of a rule or lexical entry name shares a single string. Those come from the
+    grammar, while terminals are word forms, an open vocabulary, so their names are left as they are.
+
+    :param tag: The tag of the element
+    :param attributes: A dict of the element attributes
+    :return (SyntaxNode):
+    """
+    if tag not in NORSOURCE_NODE_TAGS:
+        raise Exception("Critical error parsing file: Found unknown element of type %s" % tag)
+
+    is_terminal = tag == 'terminal'
+    name = attributes.get('name')
+    return SyntaxNode(
+        id=attributes.get('id'),
+        name=name if is_terminal else intern_name(name),
+        beg=attributes.get('beg'),
+        end=attributes.get('end'),
+        parent_id=attributes.get('parent'),
+        num=attributes.get('num'),
+        pct=attributes.get('pct'),
+        is_terminal=is_terminal
+    )
+
+
+class ElementTreeBackend(object):
+    """
+    Backend built on xml.etree.ElementTree.
+    """
+    name = XML_BACKEND_ETREE
+    etree = ET
+
+    def parse(self, fp):
+        """
+        Parses a whole Norsource file into an ElementTree.
+
+        :param fp: A binary file object
+        :return: An ElementTree
+        """
+        return self.etree.parse(fp)
+
+    def fromstring(self, string):
+        """
+        Parses a Norsource document in string-form into an Element.
+
+        :param string:
+        :return: An Element
+        """
+        return self.etree.fromstring(string)
+
+    def iterparse(self, fp):
+        return self.etree.iterparse(fp, events=('start', 'end'))
+
+    def iter_elements(self, fp):
+        """
+        Streams a Norsource file, yielding every <parse> element as soon as it has been closed. Once the consumer
+        is done with an element it is cleared, together with the references the root keeps to it, so only a single
+        <parse> element is held in memory at any time.
+
+        :param fp: A binary file object
+        :return: A generator of elements
+        """
+        root = None
+        for event, element in self.iterparse(fp):
+            if event == 'start':
+                if root is None:
+                    root = element
+                continue
+
+            if element.tag != NORSOURCE_ROOT_TAG:
+                continue
+
+            yield element
+
+            element.clear()
+            if root is not element:
+                # Drop the references the root keeps to already consumed <parse> elements
+                root.clear()
+
+    def iter_records(self, fp, syntax_tree=True):
+        """
+        Streams a Norsource file, yielding a ParseRecord for every <parse> element.
+
+        :param fp: A binary file object
+        :param syntax_tree: If False, <syntax-tree> elements are skipped, and the records only carry the input and
+                            posTree
+        :return: A generator of ParseRecords
+        """
+        for element in self.iter_elements(fp):
+            yield self.record_from_element(element, syntax_tree)
+
+    @staticmethod
+    def record_from_element(element, syntax_tree=True):
+        """
+        Creates a ParseRecord from a <parse> element.
+
+        :param element: An element representing a <parse> node
+        :param syntax_tree: If False, the <syntax-tree> element is skipped
+        :return (ParseRecord):
+        """
+        record = ParseRecord()
+
+        input_el = element.find(NORSOURCE_INPUT_TAG)
+        if input_el is not None:
+            record.input = input_el.text
+
+        pos_tree_el = element.find(NORSOURCE_POSTREE_TAG)
+        if pos_tree_el is not None:
+            record.pos_tree = pos_tree_el.text
+
+        if not syntax_tree:
+            return record
+
+        syntax_tree_el = element.find(NORSOURCE_SYNTAXTREE_TAG)
+        if syntax_tree_el is not None:
+            record.syntax_tree = UnresolvedSyntaxTree(top=syntax_tree_el.attrib.get('top'))
+            for node_el in syntax_tree_el:
+                record.syntax_tree.add_node(create_syntax_node(node_el.tag, node_el.attrib))
+
+        return record
+
+
+def import_lxml():
+    """
+    Imports lxml.etree, which takes a while, so we only do so once the lxml backend is asked for.
+
+    :return: The lxml.etree module, or None if lxml is not installed
+    """
+    try:
+        from lxml import etree
+    except ImportError:
+        return None
+    LxmlBackend.etree = etree
+    return etree
+
+
+class LxmlBackend(ElementTreeBackend):
+    """
+    Backend built on lxml, which is a drop-in replacement for ElementTree with a considerably faster parser. The
+    etree attribute is set by import_lxml.
+    """
+    name = XML_BACKEND_LXML
+    etree = None
+
+    def parse(self, fp):
+        return self.etree.parse(fp, self.etree.XMLParser(remove_comments=True, remove_pis=True))
+
+    def fromstring(self, string):
+        if not isinstance(string, bytes):
+            # lxml refuses unicode strings carrying an encoding declaration
+            string = string.encode('utf-8')
+        return self.etree.fromstring(string, self.etree.XMLParser(remove_comments=True, remove_pis=True))
+
+    def iterparse(self, fp):
+        return self.etree.iterparse(fp, events=('start', 'end'), remove_comments=True, remove_pis=True)
+
+
+class _ExpatRecordBuilder(object):
+    """
+    SAX handler building ParseRecords from expat events. It mirrors what ElementTreeBackend.record_from_element
+    extracts: The text of the first <input> and <posTree> child, and the nodes of the first <syntax-tree> child.
+    """
+
+    def __init__(self, syntax_tree=True):
+        self.records = []
+        self._syntax_tree = syntax_tree
+        self._record = None
+        self._depth = 0
+        self._text = None
+        self._text_tag = None
+        self._in_syntax_tree = False
+
+    def start(self, tag, attributes):
+        if self._record is None:
+            if tag == NORSOURCE_ROOT_TAG:
+                self._record = ParseRecord()
+                self._depth = 0
+            return
+
+        self._depth += 1
+        if self._text is not None:
+            # Like ElementTree, we only keep the text preceding the first child
+            self._finish_text()
+
+        if self._depth == 1:
+            if tag == NORSOURCE_INPUT_TAG and self._record.input is None:
+                self._start_text(tag)
+            elif tag == NORSOURCE_POSTREE_TAG and self._record.pos_tree is None:
+                self._start_text(tag)
+            elif tag == NORSOURCE_SYNTAXTREE_TAG and self._syntax_tree and self._record.syntax_tree is None:
+                self._record.syntax_tree = UnresolvedSyntaxTree(top=attributes.get('top'))
+                self._in_syntax_tree = True
+        elif self._depth == 2 and self._in_syntax_tree:
+            self._record.syntax_tree.add_node(create_syntax_node(tag, attributes))
+
+    def end(self, tag):
+        if self._record is None:
+            return
+
+        if self._depth == 0:
+            self.records.append(self._record)
+            self._record = None
+            return
+
+        if self._text is not None:
+            self._finish_text()
+        if self._depth == 1:
+            self._in_syntax_tree = False
+        self._depth -= 1
+
+    def characters(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def _start_text(self, tag):
+        self._text = []
+        self._text_tag = tag
+
+    def _finish_text(self):
+        text = "".join(self._text) or None
+        if self._text_tag == NORSOURCE_INPUT_TAG:
+            self._record.input = text
+        else:
+            self._record.pos_tree = text
+        self._text = None
+        self._text_tag = None
+
+
+class ExpatBackend(ElementTreeBackend):
+    """
+    Backend streaming records straight from a raw expat parser. No DOM is built while streaming; whole-document
+    parsing falls back to ElementTree.
+    """
+    name = XML_BACKEND_EXPAT
+
+    def iter_records(self, fp, syntax_tree=True):
+        from xml.parsers import expat
+
+        builder = _ExpatRecordBuilder(syntax_tree)
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.StartElementHandler = builder.start
+        parser.EndElementHandler = builder.end
+        parser.CharacterDataHandler = builder.characters
+
+        while True:
+            data = fp.read(EXPAT_CHUNK_SIZE)
+            parser.Parse(data, len(data) == 0)
+
+            records = builder.records
+            builder.records = []
+            for record in records:
+                yield record
+
+            if len(data) == 0:
+                break
+
+
+BACKENDS = {
+    XML_BACKEND_ETREE: ElementTreeBackend,
+    XML_BACKEND_LXML: LxmlBackend,
+    XML_BACKEND_EXPAT: ExpatBackend,
+}
+
+
+def get_backend(name=None):
+    """
+    Gets an XML backend by name, defaulting to config.XML_BACKEND. If lxml is requested but not installed, we fall
+    back to ElementTree.
+
+    :param name: One of XML_BACKENDS
+    :return: An XML backend instance
+    """
+    name = name or config.XML_BACKEND
+    if name not in BACKENDS:
+        raise ValueError("Unknown XML backend: %s" % name)
+
+    if name == XML_BACKEND_LXML and import_lxml() is None:
+        if config.DEBUG:
+            print("lxml is not installed, falling back to the %s backend" % XML_BACKEND_ETREE)
+        name = XML_BACKEND_ETREE
+
+    return BACKENDS[name]()
@@ -0,0 +1,276 @@
+"""
+This file contains the precompiled resource bundle, written by `norsourceparser compile-resources`.
+
+A bundle stores the large JSON resources as hash tables which are read straight from a memory mapping. Nothing is
+parsed on startup, and every process using the bundle shares its pages, so workers of a process pool start
+instantly. Values are decoded the first time they are looked up.
+
+Layout (native byte order):
+
+    magic, uint32 format version, uint32 header size, header
+    a table for every resource, each aligned to 4 bytes
+
+The header is JSON, holding the content hash of the JSON resources the bundle was compiled from, their sizes and
+modification times, and the offset of every table. A table is
+
+    int32 entry count, int32 slot count
+    int32 slots, each holding an entry index or -1. Keys are placed by the crc32 of their utf-8 encoding
+    int32 key offset, key length, value offset and value length of every entry, in the order of the JSON file
+    the utf-8 encoded keys and JSON encoded values
+"""
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+from array import array
+
+BUNDLE_MAGIC = b'NSRB'
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_FILENAME = 'resources.bundle'
+BUNDLED_RESOURCES = ['gloss', 'pos', 'verb_lex', 'verb_corrlist', 'noun_inflections', 'dominating_mappings']
+
+_PREAMBLE = struct.Struct('=4sII')
+_ENTRY_FIELDS = 4
+
+
+def _get_source_stats(resources_dir):
+    stats = {}
+    for name in sorted(os.listdir(resources_dir)):
+        if not name.endswith('.json'):
+            continue
+        stat = os.stat(os.path.join(resources_dir, name))
+        stats[name] = [stat.st_size, int(stat.st_mtime * 1000000)]
+    return stats
+
+
+def _encode_table(mapping):
+    """
+    Encodes a dict as a bundle table.
+
+    :param mapping: A dict with string keys and JSON serializable values
+    :return: The table as bytes
+    """
+    slot_count = 8
+    while slot_count < 2 * len(mapping):
+        slot_count *= 2
+    mask = slot_count - 1
+
+    slots = array('i', [-1] * slot_count)
+    entries = array('i')
+    blob = bytearray()
+    for index, (key, value) in enumerate(mapping.items()):
+        key_bytes = key.encode('utf-8')
+        value_bytes = json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+        entries.extend([len(blob), len(key_bytes), len(blob) + len(key_bytes), len(value_bytes)])
+        blob.extend(key_bytes)
+        blob.extend(value_bytes)
+
+        slot = zlib.crc32(key_bytes) & mask
+        while slots[slot] != -1:
+            slot = (slot + 1) & mask
+        slots[slot] = index
+
+    # Keep the next table aligned
+    blob.extend(b'\0' * (-len(blob) % 4))
+    return array('i', [len(mapping), slot_count]).tobytes() + slots.tobytes() + entries.tobytes() + bytes(blob)
+
+
+def write_bundle(filename, resources_dir, content_hash, names=None):
+    """
+    Compiles JSON resources into a bundle.
+
+    :param filename: The path of the bundle
+    :param resources_dir: The directory of the JSON resources
+    :param content_hash: The hash of the JSON resources, see util.get_resources_version
+    :param names: The resources to bundle. Defaults to BUNDLED_RESOURCES
+    :return: void
+    """
+    tables = []
+    for name in names or BUNDLED_RESOURCES:
+        with open(os.path.join(resources_dir, '%s.json' % name), 'r') as fp:
+            tables.append((name, _encode_table(json.load(fp))))
+
+    header = {
+        'content_hash': content_hash,
+        'byteorder': sys.byteorder,
+        'sources': _get_source_stats(resources_dir),
+        'tables': {},
+    }
+    # The offsets of the tables depend on the size of the header, so we grow it until they fit
+    start = _PREAMBLE.size
+    while True:
+        offset = start
+        for name, table in tables:
+            header['tables'][name] = [offset, len(table)]
+            offset += len(table)
+        header_bytes = json.dumps(header, sort_keys=True).encode('utf-8')
+        if _PREAMBLE.size + len(header_bytes) <= start:
+            break
+        start = _PREAMBLE.size + len(header_bytes)
+        start += -start % 4
+
+    header_bytes += b' ' * (start - _PREAMBLE.size - len(header_bytes))
+
+    with open(filename, 'wb') as fp:
+        fp.write(_PREAMBLE.pack(BUNDLE_MAGIC, BUNDLE_FORMAT_VERSION, len(header_bytes)))
+        fp.write(header_bytes)
+        for name, table in tables:
+            fp.write(table)
+
+
+class MappedTable(object):
+    """
+    A read-only dict of a bundle table. Keys are found by probing the hash table in the mapping, and values are
+    decoded, and kept, on first access.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        count, slot_count = buffer[:8].cast('i')
+        self._count = count
+        self._mask = slot_count - 1
+        position = 8
+        self._slots = buffer[position:position + 4 * slot_count].cast('i')
+        position += 4 * slot_count
+        self._entries = buffer[position:position + 4 * _ENTRY_FIELDS * count].cast('i')
+        position += 4 * _ENTRY_FIELDS * count
+        self._blob = buffer[position:]
+        self._values = {}
+
+    def _find(self, key):
+        if not isinstance(key, str):
+            return -1
+        key_bytes = key.encode('utf-8')
+        slot = zlib.crc32(key_bytes) & self._mask
+        while True:
+            index = self._slots[slot]
+            if index == -1:
+                return -1
+            key_offset = self._entries[index * _ENTRY_FIELDS]
+            key_length = self._entries[index * _ENTRY_FIELDS + 1]
+            if key_length == len(key_bytes) and self._blob[key_offset:key_offset + key_length] == key_bytes:
+                return index
+            slot = (slot + 1) & self._mask
+
+    def _key(self, index):
+        key_offset = self._entries[index * _ENTRY_FIELDS]
+        key_length = self._entries[index * _ENTRY_FIELDS + 1]
+        return bytes(self._blob[key_offset:key_offset + key_length]).decode('utf-8')
+
+    def _value(self, index):
+        value = self._values.get(index)
+        if value is None:
+            value_offset = self._entries[index * _ENTRY_FIELDS + 2]
+            value_length = self._entries[index * _ENTRY_FIELDS + 3]
+            value = json.loads(bytes(self._blob[value_offset:value_offset + value_length]).decode('utf-8'))
+            self._values[index] = value
+        return value
+
+    def get(self, key, default=None):
+        index = self._find(key)
+        if index == -1:
+            return default
+        return self._value(index)
+
+    def keys(self):
+        return [self._key(index) for index in range(self._count)]
+
+    def values(self):
+        return [self._value(index) for index in range(self._count)]
+
+    def items(self):
+        return [(self._key(index), self._value(index)) for index in range(self._count)]
+
+    def __getitem__(self, key):
+        index = self._find(key)
+        if index == -1:
+            raise KeyError(key)
+        return self._value(index)
+
+    def __contains__(self, key):
+        return self._find(key) != -1
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return self._count
+
+
+class ResourceBundle(object):
+    """
+    A memory-mapped resource bundle.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+
+        magic, version, header_size = _PREAMBLE.unpack_from(self._buffer, 0)
+        if magic != BUNDLE_MAGIC:
+            raise ValueError("%s is not a resource bundle" % filename)
+        self.version = version
+        self.header = {}
+        if version == BUNDLE_FORMAT_VERSION:
+            self.header = json.loads(bytes(self._buffer[_PREAMBLE.size:_PREAMBLE.size + header_size]).decode('utf-8'))
+
+    @property
+    def content_hash(self):
+        return self.header.get('content_hash')
+
+    def is_fresh(self, resources_dir, get_content_hash):
+        """
+        Checks if the bundle was compiled from the current JSON resources, and can be read on this machine. If the
+        sizes and modification times of the JSON resources are unchanged, we trust the bundle without hashing them.
+
+        :param resources_dir: The directory of the JSON resources
+        :param get_content_hash: A function returning the hash of the JSON resources
+        :return: True or False
+        """
+        if self.version != BUNDLE_FORMAT_VERSION or self.header.get('byteorder') != sys.byteorder:
+            return False
+        if self.header.get('sources') == _get_source_stats(resources_dir):
+            return True
+        return self.content_hash == get_content_hash()
+
+    def get_table(self, name):
+        """
+        Gets a resource.
+
+        :param name:
+        :return (MappedTable): The resource, or None if it is not in the bundle
+        """
+        if name not in self.header.get('tables', {}):
+            return None
+        offset, length = self.header['tables'][name]
+        return MappedTable(self._buffer[offset:offset + length])
+
+    def __contains__(self, name):
+        return name in self.header.get('tables', {})
+
+
+def open_bundle(filename, resources_dir, get_content_hash):
+    """
+    Opens a resource bundle, if it exists and is fresh.
+
+    :param filename: The path of the bundle
+    :param resources_dir: The directory of the JSON resources
+    :param get_content_hash: A function returning the hash of the JSON resources
+    :return (ResourceBundle): The bundle, or None if we should fall back to the JSON resources
+    """
+    if not os.path.exists(filename):
+        return None
+
+    try:
+        bundle = ResourceBundle(filename)
+    except (ValueError, struct.error, OSError):
+        return None
+
+    if not bundle.is_fresh(resources_dir, get_content_hash):
+        return None
+    return bundle
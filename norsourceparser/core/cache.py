@@ -0,0 +1,137 @@
+"""
+This file contains an on-disk, content-addressed cache of converted phrases.
+
+Every <parse> element is keyed by a hash of the contents we convert (the input and every syntax-tree node), the
+version of the package, the sources of the conversion code and the contents of the resource files. Re-converting a
+file where only a few sentences have changed thus only resolves and reduces the changed sentences.
+"""
+import os
+import hashlib
+import pickle
+import sqlite3
+
+from norsourceparser import __version__
+from norsourceparser.core.util import get_resources_version
+
+# The number of puts between every commit to the database
+CACHE_COMMIT_INTERVAL = 500
+
+# The modules whose code decides how a sentence is converted. Editing any of them invalidates the cache, even if
+# the version of the package stays the same
+CONVERTER_MODULES = ['constants.py', 'glosses.py', 'models.py', 'rules.py', 'util.py']
+
+_SEPARATOR = u'\x1f'
+
+_converter_version = None
+
+
+def _text(value):
+    return u'' if value is None else value
+
+
+def get_converter_version():
+    """
+    Returns a hash of the sources of the conversion code, see CONVERTER_MODULES. It is computed once per process.
+
+    :return: A hex digest
+    """
+    global _converter_version
+    if _converter_version is None:
+        digest = hashlib.sha1()
+        for name in CONVERTER_MODULES:
+            digest.update(name.encode('utf-8'))
+            with open(os.path.join(os.path.dirname(__file__), name), 'rb') as fp:
+                digest.update(fp.read())
+        _converter_version = digest.hexdigest()
+    return _converter_version
+
+
+def get_record_key(record):
+    """
+    Computes the cache key of a ParseRecord.
+
+    :param (ParseRecord) record:
+    :return: A hex digest
+    """
+    parts = [__version__, get_converter_version(), get_resources_version(), _text(record.input)]
+    if record.syntax_tree is not None:
+        parts.append(_text(record.syntax_tree.top))
+        for node in record.syntax_tree:
+            parts.extend([
+                u'T' if node.is_terminal else u'N',
+                _text(node.id),
+                _text(node.name),
+                _text(node.parent_id),
+                _text(node.beg),
+                _text(node.end),
+                _text(node.num),
+                _text(node.pct),
+            ])
+
+    return hashlib.sha1(_SEPARATOR.join(parts).encode('utf-8')).hexdigest()
+
+
+class PhraseCache(object):
+    """
+    A cache of converted Typecraft Phrases, stored in an sqlite database.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (or creates) a cache.
+
+        :param path: The path of the cache database
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._uncommitted = 0
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS phrases (key TEXT PRIMARY KEY, phrase BLOB NOT NULL)')
+        self._connection.commit()
+
+    def get(self, key):
+        """
+        Gets a phrase from the cache.
+
+        :param key: A key as computed by get_record_key
+        :return: A Typecraft Phrase, or None if the key is not present
+        """
+        row = self._connection.execute('SELECT phrase FROM phrases WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return pickle.loads(bytes(row[0]))
+
+    def put(self, key, phrase):
+        """
+        Stores a phrase in the cache.
+
+        :param key: A key as computed by get_record_key
+        :param phrase: A Typecraft Phrase
+        :return: void
+        """
+        blob = sqlite3.Binary(pickle.dumps(phrase, pickle.HIGHEST_PROTOCOL))
+        self._connection.execute('INSERT OR REPLACE INTO phrases (key, phrase) VALUES (?, ?)', (key, blob))
+        self._uncommitted += 1
+        if self._uncommitted >= CACHE_COMMIT_INTERVAL:
+            self.commit()
+
+    def commit(self):
+        self._connection.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute('SELECT COUNT(*) FROM phrases').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
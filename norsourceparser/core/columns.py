@@ -0,0 +1,161 @@
+"""
+This file contains the columnar export of converted phrases, for analytics over large corpora.
+
+Words and morphemes are stored in two tables of integer columns. Word forms, POS tags, morphemes and glosses are
+coded by vocabularies, so corpus statistics become vectorized operations over the columns:
+
+    words:      word_phrase, word_form, word_pos, word_morpheme_start, word_morpheme_count
+    morphemes:  morpheme_word, morpheme_form, morpheme_gloss
+
+The columns are plain arrays, saved as an .npz archive with NumPy, which is an optional dependency.
+"""
+from array import array
+
+from norsourceparser.core.names import NameTable
+from norsourceparser.core.parser import Parser
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+WORD_COLUMNS = ['word_phrase', 'word_form', 'word_pos', 'word_morpheme_start', 'word_morpheme_count']
+MORPHEME_COLUMNS = ['morpheme_word', 'morpheme_form', 'morpheme_gloss']
+VOCABULARIES = ['forms', 'pos', 'morphemes', 'glosses']
+
+# The number of phrases appended to the columns at a time
+EXPORT_BATCH_SIZE = 256
+
+
+class ColumnarExport(object):
+    """
+    Columnar buffers of words and morphemes, appended to in batches of phrases.
+    """
+
+    def __init__(self):
+        self.phrase_count = 0
+        self.columns = dict((name, array('i')) for name in WORD_COLUMNS + MORPHEME_COLUMNS)
+        self.vocabularies = dict((name, NameTable()) for name in VOCABULARIES)
+
+    def add_tree(self, tree):
+        """
+        Appends the words of a ReducedSyntaxTree.
+
+        :param (ReducedSyntaxTree) tree:
+        :return: void
+        """
+        self.add_views([tree.view()])
+
+    def add_views(self, views):
+        """
+        Appends a batch of phrases.
+
+        :param views: An iterable of ReducedPhraseViews
+        :return: void
+        """
+        forms = self.vocabularies['forms']
+        pos = self.vocabularies['pos']
+        morphemes = self.vocabularies['morphemes']
+        glosses = self.vocabularies['glosses']
+
+        rows = dict((name, []) for name in WORD_COLUMNS + MORPHEME_COLUMNS)
+        word_index = len(self.columns['word_phrase'])
+        morpheme_index = len(self.columns['morpheme_word'])
+
+        for view in views:
+            for word in view:
+                word_morphemes = word.morphemes
+                word_glosses = word.glosses
+
+                rows['word_phrase'].append(self.phrase_count)
+                rows['word_form'].append(forms.intern(word.word))
+                rows['word_pos'].append(pos.intern(word.pos or ""))
+                rows['word_morpheme_start'].append(morpheme_index)
+                rows['word_morpheme_count'].append(len(word_morphemes))
+
+                for i, morpheme in enumerate(word_morphemes):
+                    # Like in the Typecraft conversion, glosses beyond the last morpheme are dropped
+                    gloss = word_glosses[i] if i < len(word_glosses) else ""
+                    rows['morpheme_word'].append(word_index)
+                    rows['morpheme_form'].append(morphemes.intern(morpheme))
+                    rows['morpheme_gloss'].append(glosses.intern(gloss))
+
+                word_index += 1
+                morpheme_index += len(word_morphemes)
+            self.phrase_count += 1
+
+        for name, values in rows.items():
+            self.columns[name].extend(values)
+
+    def get_vocabulary(self, name):
+        """
+        Gets a vocabulary as a list, where the code of every entry is its index.
+
+        :param name: One of VOCABULARIES
+        :return: A list of strings
+        """
+        table = self.vocabularies[name]
+        return [table.get_name(code) for code in range(len(table))]
+
+    def to_arrays(self):
+        """
+        Converts the columns and vocabularies to NumPy arrays.
+
+        :return: A dict of arrays, keyed by column or vocabulary name
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for the columnar export. Install norsourceparser[numpy]")
+
+        arrays = dict((name, numpy.frombuffer(column, dtype=numpy.int32).copy())
+                      for name, column in self.columns.items())
+        for name in VOCABULARIES:
+            arrays[name] = numpy.array(self.get_vocabulary(name), dtype=str)
+        return arrays
+
+    def save(self, path):
+        """
+        Saves the columns and vocabularies as a compressed .npz archive.
+
+        :param path: A file path or file object
+        :return: void
+        """
+        arrays = self.to_arrays()
+        numpy.savez_compressed(path, **arrays)
+
+    def __len__(self):
+        return len(self.columns['word_phrase'])
+
+
+def export_file(filename, path, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Streams a Norsource file into a columnar .npz archive.
+
+    :param filename: A file path (or file object) to a norsource file
+    :param path: The path of the .npz archive
+    :param batch_size: The number of phrases appended to the columns at a time
+    :return (ColumnarExport): The export
+    """
+    export = ColumnarExport()
+    batch = []
+    for view in Parser.iter_phrase_views(filename):
+        batch.append(view)
+        if len(batch) >= batch_size:
+            export.add_views(batch)
+            batch = []
+    export.add_views(batch)
+    export.save(path)
+    return export
+
+
+def load_columns(path):
+    """
+    Loads an .npz archive written by ColumnarExport.save.
+
+    :param path:
+    :return: A dict of arrays, keyed by column or vocabulary name
+    """
+    if numpy is None:
+        raise ImportError("NumPy is required for the columnar export. Install norsourceparser[numpy]")
+
+    with numpy.load(path) as archive:
+        return dict((name, archive[name]) for name in archive.files)
@@ -2,6 +2,29 @@
 class Config(object):
     DEBUG = False
     MAX_PHRASES_PER_TEXT = -1
+    XML_BACKEND = 'etree'
+    BRANCH_CACHE_SIZE = 65536
+    LOOKUP_CACHE_SIZE = 16384
+    # The compiled resource bundle. None means resources.bundle in the resources directory
+    RESOURCES_BUNDLE = None
+
+    def snapshot(self):
+        """
+        Returns the current settings, e.g. to hand them to worker processes.
+
+        :return: A dict of setting names and values
+        """
+        return dict((name, getattr(self, name)) for name in dir(self) if name.isupper())
+
+    def update(self, settings):
+        """
+        Applies settings returned by snapshot.
+
+        :param settings: A dict of setting names and values
+        :return: void
+        """
+        for name, value in settings.items():
+            setattr(self, name, value)
 
 
 config = Config()
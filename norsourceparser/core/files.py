@@ -0,0 +1,91 @@
+"""
+This file contains helpers for opening Norsource input, transparently handling compressed and very large files.
+
+The decompression modules are only imported once compressed input is actually found.
+"""
+import contextlib
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+BZ2_MAGIC = b'BZh'
+XZ_MAGIC = b'\xfd7zXZ\x00'
+
+# Suffixes of compressed Norsource files, as accepted by open_norsource
+COMPRESSED_SUFFIXES = ['.gz', '.bz2', '.xz']
+
+
+def get_decompressor(magic):
+    """
+    Finds a function that opens a compressed stream based on the leading bytes of a file.
+
+    :param magic: The first few bytes of a file
+    :return: A function taking a file object and returning a decompressing file object, or None for plain files
+    """
+    if magic.startswith(GZIP_MAGIC):
+        import gzip
+        return lambda fp: gzip.GzipFile(fileobj=fp, mode='rb')
+    if magic.startswith(BZ2_MAGIC):
+        import bz2
+        return lambda fp: bz2.BZ2File(fp, mode='rb')
+    if magic.startswith(XZ_MAGIC):
+        try:
+            import lzma
+        except ImportError:
+            raise IOError("Unable to read xz-compressed input: The lzma module is not available")
+        return lambda fp: lzma.LZMAFile(fp, mode='rb')
+    return None
+
+
+def peek_magic(fp, size=len(XZ_MAGIC)):
+    """
+    Reads the leading bytes of a file object without consuming them. Returns an empty string if the file object
+    can be neither peeked nor rewound.
+
+    :param fp: A file object opened in binary mode
+    :param size: The number of bytes to read
+    :return: The leading bytes
+    """
+    if hasattr(fp, 'peek'):
+        return fp.peek(size)[:size]
+
+    try:
+        position = fp.tell()
+        magic = fp.read(size)
+        fp.seek(position)
+        return magic
+    except (AttributeError, IOError, OSError):
+        return b''
+
+
+@contextlib.contextmanager
+def open_norsource(filename):
+    """
+    Opens a Norsource file for reading, yielding a binary file object suitable for the XML parser.
+
+    gzip, bz2 and xz compressed input is detected by its leading bytes and decompressed while being read. Plain
+    files are read through the usual buffered file object. The XML parsers pull the input in small chunks, so
+    memory stays flat however large the file is.
+
+    :param filename: A file path, or a file object opened in binary mode
+    :return: A binary file object
+    """
+    if hasattr(filename, 'read'):
+        magic = peek_magic(filename)
+        decompressor = get_decompressor(magic) if isinstance(magic, bytes) else None
+        if decompressor is None:
+            yield filename
+        else:
+            with contextlib.closing(decompressor(filename)) as stream:
+                yield stream
+        return
+
+    with open(filename, 'rb') as fp:
+        decompressor = get_decompressor(fp.read(len(XZ_MAGIC)))
+        fp.seek(0)
+
+        if decompressor is None:
+            yield fp
+            return
+
+        with contextlib.closing(decompressor(fp)) as stream:
+            yield stream
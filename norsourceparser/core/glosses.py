@@ -0,0 +1,116 @@
+"""
+This file contains the structured representation of glosses used while merging gloss rules.
+
+A gloss such as "DEF.PL" is a set of features. Merging two glosses of a morpheme slot is then a set union, and the
+dotted string is only rendered once, when the phrase is converted to Typecraft.
+"""
+from norsourceparser.core.names import intern_name
+from norsourceparser.core.util import resources
+
+
+class GlossFeatures(object):
+    """
+    The gloss of a single morpheme slot, as an interned set of features.
+
+    The label is the exact dotted string of the gloss when we know it, i.e. when the gloss comes straight from a rule
+    or from the concatenation superfluity table. A merged gloss has no label until it is rendered, in which case
+    the features are sorted and joined with dots.
+    """
+    __slots__ = ('features', 'label')
+
+    def __init__(self, features, label=None):
+        self.features = features
+        self.label = label
+
+    def render(self):
+        """
+        Renders the gloss as a dotted string.
+
+        :return: String
+        """
+        if self.label is None:
+            self.label = ".".join(sorted(self.features))
+        return self.label
+
+    def __str__(self):
+        return self.render()
+
+    def __unicode__(self):
+        return self.render()
+
+
+# Every distinct feature set is stored once
+_feature_sets = {}
+
+# The GlossFeatures of every gloss string seen so far
+_parsed_glosses = {}
+
+
+def intern_features(features):
+    """
+    Interns a set of features, returning the single frozenset representing it.
+
+    :param features: An iterable of features
+    :return: A frozenset
+    """
+    features = frozenset(features)
+    return _feature_sets.setdefault(features, features)
+
+
+def parse_gloss(gloss):
+    """
+    Parses a dotted gloss string into GlossFeatures. GlossFeatures are passed through as they are.
+
+    :param gloss: A String or GlossFeatures
+    :return (GlossFeatures):
+    """
+    if isinstance(gloss, GlossFeatures):
+        return gloss
+
+    parsed = _parsed_glosses.get(gloss)
+    if parsed is None:
+        parsed = GlossFeatures(intern_features(map(intern_name, gloss.split("."))), gloss)
+        _parsed_glosses[gloss] = parsed
+    return parsed
+
+
+def _build_superfluity_sets():
+    # Pruning only ever applies to merged glosses, which are sorted, so keys that are not sorted never match
+    superfluity_sets = {}
+    for key, value in resources.concatenation_superfluity.items():
+        features = key.split(".")
+        if key != ".".join(sorted(set(features))):
+            continue
+        superfluity_sets[intern_features(features)] = parse_gloss(value)
+    return superfluity_sets
+
+
+resources.register('superfluity_sets', _build_superfluity_sets)
+
+
+def merge_glosses(current, other):
+    """
+    Merges two glosses of the same morpheme slot, removing duplicate features and pruning superfluous
+    concatenations.
+
+    :param current: A String or GlossFeatures
+    :param other: A String or GlossFeatures
+    :return (GlossFeatures):
+    """
+    features = intern_features(parse_gloss(current).features | parse_gloss(other).features)
+    pruned = resources.superfluity_sets.get(features)
+    if pruned is not None:
+        return pruned
+    return GlossFeatures(features)
+
+
+def render_gloss(gloss):
+    """
+    Renders a gloss as a dotted string. Strings are returned as they are.
+
+    :param gloss: A String or GlossFeatures
+    :return: String
+    """
+    if isinstance(gloss, GlossFeatures):
+        return gloss.render()
+    return gloss
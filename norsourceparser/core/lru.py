@@ -0,0 +1,95 @@
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    A bounded mapping evicting the least recently used entry once it is full. It keeps hit, miss and eviction
+    counters, so we can size it.
+
+    A maxsize of 0 disables the cache, while a maxsize of -1 makes it unbounded.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        """
+        Gets an entry, marking it as the most recently used.
+
+        :param key:
+        :param default: Returned (and counted as a miss) if the key is not present
+        :return:
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Adds an entry, evicting the least recently used entries if the cache is full.
+
+        :param key:
+        :param value:
+        :return: void
+        """
+        if self.maxsize == 0:
+            return
+
+        self._data.pop(key, None)
+        self._data[key] = value
+        self._evict()
+
+    def resize(self, maxsize):
+        """
+        Changes the size of the cache, evicting entries if it shrinks.
+
+        :param maxsize:
+        :return: void
+        """
+        self.maxsize = maxsize
+        self._evict()
+
+    def clear(self):
+        """
+        Removes every entry and resets the counters.
+        :return: void
+        """
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the counters of the cache.
+
+        :return: A dict with hits, misses, evictions, size and maxsize
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+    def _evict(self):
+        if self.maxsize < 0:
+            return
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
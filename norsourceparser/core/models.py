@@ -1,16 +1,16 @@
 import re
 import difflib
+from array import array
 
 from norsourceparser.core.constants import REDUCED_RULE_MORPHOLOGICAL_BREAKUP, REDUCED_RULE_POS, REDUCED_RULE_GLOSSES, \
     REDUCED_RULE_VALENCY, REDUCED_RULE_CITATION_FORM, REDUCED_RULE_CONSTRUCTION_FORM, REDUCED_RULE_PRIORITY_MERGE, \
     REDUCED_RULE_PRIORITY_DOMINATE
-from norsourceparser.core.rules import get_rules_from_partial_branch, Rule
+from norsourceparser.core.rules import get_cached_rules_from_partial_branch, get_cached_rules_from_names, Rule
+from norsourceparser.core.names import NameTable
+from norsourceparser.core.glosses import merge_glosses, render_gloss
 from . import config
 
-from typecraft_python.models import Text, Phrase, Word, Morpheme, GlobalTag
-
-from norsourceparser.core.util import split_lexical_entry, get_pos, get_gloss, get_inflectional_rules, \
-    prune_common_concatenation_superfluity
+from norsourceparser.core.util import split_lexical_entry, get_pos, get_gloss, get_inflectional_rules
 
 
 class AbstractSyntaxTree(object):
@@ -71,11 +71,10 @@ class ReducedNode(object):
                     print(u"Warning: Found merge for non-gloss: %s %s" % (unicode(rule), unicode(current_rule)))
                     return
 
-                # Remove duplicates and prune concatenation
-                new_value = map(lambda val_tuple: val_tuple[0] + "." + val_tuple[1], zip(current_rule.value, rule.value))
-                new_value = map(lambda x: ".".join(sorted(set(x.split(".")))), new_value)
-                new_value = map(prune_common_concatenation_superfluity, new_value)
-                current_rule.value = new_value
+                # Merge the feature sets of every slot. They are rendered to strings in convert_to_tc
+                current_rule.value = [
+                    merge_glosses(current, other) for current, other in zip(current_rule.value, rule.value)
+                ]
             else:
                 self.rules[rule.rule_id] = rule
 
@@ -117,6 +116,146 @@ class ReducedNode(object):
             return self.base_token
 
 
+class ReducedWordView(object):
+    """
+    A read-only view of a single word of a ReducedSyntaxTree. Every field is derived from the rules of the
+    underlying ReducedNode when accessed.
+    """
+    __slots__ = ('node',)
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def word(self):
+        return self.node.get_completed_word_token()
+
+    @property
+    def pos(self):
+        return self.node.get(REDUCED_RULE_POS, "")
+
+    @property
+    def morphemes(self):
+        return list(self.node.get(REDUCED_RULE_MORPHOLOGICAL_BREAKUP, []))
+
+    @property
+    def baseform(self):
+        return self.node.get(REDUCED_RULE_CITATION_FORM, "")
+
+    @property
+    def glosses(self):
+        """
+        The glosses of every morpheme slot, rendered as dotted strings.
+        :return:
+        """
+        return [render_gloss(gloss_rule) for gloss_rule in self.node.get(REDUCED_RULE_GLOSSES, [])]
+
+    @property
+    def valency(self):
+        return self.node.get(REDUCED_RULE_VALENCY)
+
+    @property
+    def construction_label(self):
+        return self.node.get(REDUCED_RULE_CONSTRUCTION_FORM)
+
+    def to_tc(self):
+        """
+        Builds the Typecraft Word of this view, with its morphemes.
+
+        :return (Word):
+        """
+        # typecraft_python pulls in yaml, and is only imported once we convert
+        from typecraft_python.models import Word, Morpheme
+
+        word = Word()
+        word.word = self.word
+        word.pos = self.pos
+
+        morphemes = []
+        for morpheme_rule in self.morphemes:
+            morpheme = Morpheme()
+            morpheme.morpheme = morpheme_rule
+
+            morphemes.append(morpheme)
+            word.add_morpheme(morpheme)
+
+        if len(morphemes) > 0:
+            morphemes[0].baseform = self.baseform
+
+        for i, gloss_rule in enumerate(self.glosses):
+            if len(morphemes) <= i:
+                break
+            if isinstance(gloss_rule, list):
+                print(word.word, gloss_rule)
+            morphemes[i].add_concatenated_glosses(gloss_rule)
+
+        return word
+
+
+class ReducedPhraseView(object):
+    """
+    A read-only view of the phrase represented by a ReducedSyntaxTree. The words are exposed as ReducedWordViews,
+    and Typecraft objects are only built by to_tc.
+    """
+
+    def __init__(self, tree, phrase=None):
+        """
+        :param (ReducedSyntaxTree) tree:
+        :param (String) phrase: The text of the phrase. Defaults to the words joined by spaces
+        """
+        self.words = [ReducedWordView(node) for node in tree]
+        self._phrase = phrase
+
+    @property
+    def phrase(self):
+        if self._phrase is None:
+            return " ".join(word.word for word in self.words)
+        return self._phrase
+
+    @phrase.setter
+    def phrase(self, value):
+        self._phrase = value
+
+    @property
+    def comment(self):
+        """
+        The comment of the phrase, listing the valency information of every word having it.
+        :return:
+        """
+        parts = []
+        for word in self.words:
+            valency = word.valency
+            if not valency:
+                continue
+            parts.append("\"%s\"\n\tSAS: %s\n" % (word.word, valency['SAS']))
+            parts.append("\tFCT: %s\n" % valency['FCT'])
+            parts.append("\tSIT: %s\n" % valency['SIT'])
+            parts.append("\tConstructionLabel: %s\n" % word.construction_label)
+        return "".join(parts)
+
+    def to_tc(self):
+        """
+        Builds the Typecraft Phrase of this view.
+
+        :return (Phrase):
+        """
+        from typecraft_python.models import Phrase
+
+        phrase = Phrase()
+        phrase.comment = self.comment
+        for word in self.words:
+            phrase.add_word(word.to_tc())
+
+        phrase.phrase = self.phrase
+        return phrase
+
+    def __iter__(self):
+        return self.words.__iter__()
+
+    def __len__(self):
+        return len(self.words)
+
+
 class ReducedSyntaxTree(AbstractSyntaxTree):
     """
     The ReducedSyntaxTree represents a SyntaxTree in a state where each of it its three-branches has been reduced into
@@ -146,51 +285,21 @@ class ReducedSyntaxTree(AbstractSyntaxTree):
         assert isinstance(node, ReducedNode)
         self._nodes = list(filter(lambda x: x != node, self._nodes))
 
+    def view(self):
+        """
+        Returns a lightweight view of the phrase represented by this tree. Typecraft objects are only built when
+        asked for, so consumers needing nothing but the words and their POS tags allocate far less.
+
+        :return (ReducedPhraseView):
+        """
+        return ReducedPhraseView(self)
+
     def convert_to_tc(self):
         """
         Converts the Reduced SyntaxTree to a typecraft_python.models.Text object
         :return:
         """
-        phrase = Phrase()
-
-        for node in self:
-            valency = node.get(REDUCED_RULE_VALENCY)
-            construction_label = node.get(REDUCED_RULE_CONSTRUCTION_FORM)
-            if valency:
-                # phrase.add_global_tag(GlobalTag(valency['SAS'], 7))
-                phrase.comment += "\"%s\"\n\tSAS: %s\n" % (node.get_completed_word_token(), valency['SAS'])
-                phrase.comment += "\tFCT: %s\n" % valency['FCT']
-                phrase.comment += "\tSIT: %s\n" % valency['SIT']
-                phrase.comment += "\tConstructionLabel: %s\n" % construction_label
-
-            word = Word()
-            word.word = node.get_completed_word_token()
-            word.pos = node.get(REDUCED_RULE_POS, "")
-
-            morphemes = []
-            for morpheme_rule in node.get(REDUCED_RULE_MORPHOLOGICAL_BREAKUP, []):
-                morpheme = Morpheme()
-                morpheme.morpheme = morpheme_rule
-
-                morphemes.append(morpheme)
-                word.add_morpheme(morpheme)
-
-            if len(morphemes) > 0:
-                morphemes[0].baseform = node.get(REDUCED_RULE_CITATION_FORM, "")
-
-            gloss_rules = list(node.get(REDUCED_RULE_GLOSSES, []))
-            for i in range(len(gloss_rules)):
-                gloss_rule = gloss_rules[i]
-                if len(morphemes) <= i:
-                    break
-                if isinstance(gloss_rule, list):
-                    print(node.get_completed_word_token(), gloss_rule)
-                morphemes[i].add_concatenated_glosses(gloss_rule)
-
-            phrase.add_word(word)
-
-        phrase.phrase = " ".join(map(lambda word: word.word, phrase.words))
-        return phrase
+        return self.view().to_tc()
 
     def __iter__(self):
         """
@@ -217,6 +326,8 @@ class ReducedSyntaxTree(AbstractSyntaxTree):
 
 
 class SyntaxNode(object):
+    __slots__ = ('beg', 'end', 'id', 'name', 'num', 'parent_id', 'parent', 'pct', 'is_terminal')
+
     def __init__(
         self,
         beg="",
@@ -266,6 +377,7 @@ class SyntaxTree(AbstractSyntaxTree):
         super(SyntaxTree, self).__init__()
         self.top = top
         self._nodes = []
+        self._nodes_by_id = {}
 
     def add_node(self, node):
         """
@@ -275,6 +387,8 @@ class SyntaxTree(AbstractSyntaxTree):
         """
         assert isinstance(node, SyntaxNode)
         self._nodes.append(node)
+        # If several nodes share an id, the first one added is the one we find
+        self._nodes_by_id.setdefault(node.id, node)
 
     def remove_node(self, node):
         """
@@ -284,20 +398,23 @@ class SyntaxTree(AbstractSyntaxTree):
         """
         assert isinstance(node, SyntaxNode)
         self._nodes = list(filter(lambda x: x != node, self._nodes))
+        if self._nodes_by_id.get(node.id) is node:
+            del self._nodes_by_id[node.id]
+            for other in self._nodes:
+                if other.id == node.id:
+                    self._nodes_by_id[node.id] = other
+                    break
 
     def find_node_by_id(self, id):
         """
-        Finds a node by id.
+        Finds a node by id. O(1)
 
         :param id:
         :return:
         """
         if id is None:
             return None
-        for node in self._nodes:
-            if node.id == id:
-                return node
-        return None
+        return self._nodes_by_id.get(id)
 
     def get_terminal_nodes(self):
         """
@@ -314,7 +431,8 @@ class SyntaxTree(AbstractSyntaxTree):
         deduce all word/morpheme rules for every word.
 
         The method in itself is fairly simple. It simply starts at each terminal node, traversing the tree upwards
-        until it reaches the root. At each point it calls get_rule_from_partial_branch.
+        until it reaches the root. At each point it calls get_rule_from_partial_branch, through a cache shared across
+        sentences.
 
 
         :return:
@@ -329,7 +447,7 @@ class SyntaxTree(AbstractSyntaxTree):
             # Traverse up the branch
             while partial_node is not None:
                 partial_branch.append(partial_node)
-                rules = get_rules_from_partial_branch(partial_branch)
+                rules = get_cached_rules_from_partial_branch(partial_branch)
                 for rule in rules:
                     reduced_node.add_rule(rule)
 
@@ -380,7 +498,8 @@ class UnresolvedSyntaxTree(SyntaxTree):
 
     def resolve(self):
         """
-        Resolves the Unresolved Tree, creating a new Syntax tree with everything wrapped up.
+        Resolves the Unresolved Tree, creating a new Syntax tree with everything wrapped up. As parents are looked
+        up in the id index, this is a single linear pass over the nodes.
 
         A new SyntaxTree is constructed, but the Nodes are modified in-place.
         :return:
@@ -395,9 +514,122 @@ class UnresolvedSyntaxTree(SyntaxTree):
         return resolved
 
 
+class CompactSyntaxTree(object):
+    """
+    A resolved SyntaxTree stored column-wise: Parallel arrays of parent indices, name ids and terminal
+    flags, instead of a SyntaxNode object per node.
+
+    It exposes the same reduce() interface as SyntaxTree, without allocating nodes while resolving or reducing.
+    """
+
+    def __init__(self, top="", names=None):
+        """
+        Initializes an empty tree.
+
+        :param (String) top: The top-node of the syntax-tree
+        :param (NameTable) names: The table of node names, which may be shared by several trees. Defaults to a table
+                                  of this tree only
+        """
+        self.top = top
+        self.names = names if names is not None else NameTable()
+        self.parents = array('i')
+        self.name_ids = array('i')
+        self.terminals = array('b')
+
+    @staticmethod
+    def from_syntax_tree(syntax_tree, names=None):
+        """
+        Creates a CompactSyntaxTree from a (possibly unresolved) SyntaxTree. Parents are resolved by their id, as in
+        UnresolvedSyntaxTree.resolve.
+
+        :param (SyntaxTree) syntax_tree:
+        :param (NameTable) names: The table of node names. Defaults to a table of this tree only
+        :return (CompactSyntaxTree):
+        """
+        compact = CompactSyntaxTree(top=syntax_tree.top, names=names)
+        intern = compact.names.intern
+
+        indices = {}
+        for index, node in enumerate(syntax_tree):
+            # If several nodes share an id, the first one is the parent, as in SyntaxTree.find_node_by_id
+            indices.setdefault(node.id, index)
+
+        for node in syntax_tree:
+            compact.parents.append(indices.get(node.parent_id, -1) if node.parent_id is not None else -1)
+            compact.name_ids.append(intern(node.name))
+            compact.terminals.append(1 if node.is_terminal else 0)
+
+        return compact
+
+    def get_name(self, index):
+        """
+        Gets the name of the node at an index.
+
+        :param index:
+        :return:
+        """
+        return self.names.get_name(self.name_ids[index])
+
+    def get_terminal_indices(self):
+        """
+        Returns the indices of the terminal nodes of this tree, in order of addition.
+        :return:
+        """
+        return [index for index, is_terminal in enumerate(self.terminals) if is_terminal]
+
+    def reduce(self):
+        """
+        Transforms the tree into a ReducedSyntaxTree. See SyntaxTree.reduce.
+
+        :return:
+        """
+        reduced_tree = ReducedSyntaxTree()
+        parents = self.parents
+        for index in self.get_terminal_indices():
+            reduced_node = ReducedNode(base_token=self.get_name(index))
+
+            names = [self.get_name(index)]
+            partial_index = parents[index]
+            # Traverse up the branch
+            while partial_index != -1:
+                names.append(self.get_name(partial_index))
+                for rule in get_cached_rules_from_names(tuple(names)):
+                    reduced_node.add_rule(rule)
+
+                partial_index = parents[partial_index]
+            reduced_tree.add_node(reduced_node)
+
+        return reduced_tree
+
+    def __len__(self):
+        """
+        Returns the size of the syntax tree, i.e. the node count
+        :return:
+        """
+        return len(self.name_ids)
+
+
 # This pattern should capture what we are looking for in the pos_tree expressions
 pos_tree_pattern = '\("([\w-]+)" \("(\w+)"\)\)'
 
+# Matches a ("POS" ("word")) leaf of a posTree. Atoms are delimited by quotes and may contain anything else, so no
+# backtracking into them is ever needed. The pattern starts with the literal (" and expects the spacing Norsource
+# writes, which lets the regex engine skip ahead to candidate leaves
+pos_tree_leaf_pattern = re.compile(r'\("([^"]*)" \("([^"]*)"\)\)')
+
+
+def tokenize_pos_tree(pos_tree):
+    """
+    Extracts the innermost ("POS" ("word")) leaves of a posTree S-expression in a single linear scan.
+
+    Unlike pos_tree_pattern, any atom is accepted, so punctuation and hyphenated words are kept. Like it, leaves
+    must be spaced the way Norsource writes them.
+
+    :param pos_tree: A posTree string
+    :return: A list of (POS, word) tuples
+    """
+    return pos_tree_leaf_pattern.findall(pos_tree)
+
 
 class PosTreeContainer(object):
     """
@@ -443,8 +675,7 @@ class PosTreeContainer(object):
         :param pos_tree:
         :return:
         """
-        # The pattern should capture what we are looking for
-        return re.findall(pos_tree_pattern, pos_tree, re.UNICODE)
+        return tokenize_pos_tree(pos_tree)
 
     def convert_to_tc(self):
         """
@@ -453,21 +684,36 @@ class PosTreeContainer(object):
         This is a very straightforward process
         :return:
         """
+        from typecraft_python.models import Text
+
         text = Text()
         text.title = "Converted Norsource"
         text.language = 'nob'
 
         for pair in self._pairs:
             (input, pos_tree) = pair
-            phrase = Phrase()
-            phrase.phrase = input
+            text.add_phrase(PosTreeContainer.convert_pair_to_tc(input, pos_tree))
 
-            for word_pos_entry in pos_tree:
-                word = Word()
-                word.word = word_pos_entry[1]
-                word.pos = word_pos_entry[0]
-                phrase.add_word(word)
+        return text
 
-            text.add_phrase(phrase)
+    @staticmethod
+    def convert_pair_to_tc(input, pos_tree):
+        """
+        Converts a single resolved input <-> pos_tree pair into a typecraft_python.model.Phrase.
 
-        return text
+        :param input: The input sentence
+        :param pos_tree: A resolved pos_tree, i.e. a list of (POS, word) tuples
+        :return:
+        """
+        from typecraft_python.models import Phrase, Word
+
+        phrase = Phrase()
+        phrase.phrase = input
+
+        for word_pos_entry in pos_tree:
+            word = Word()
+            word.word = word_pos_entry[1]
+            word.pos = word_pos_entry[0]
+            phrase.add_word(word)
+
+        return phrase
@@ -0,0 +1,53 @@
+import sys
+
+
+def intern_name(name):
+    """
+    Interns a string with sys.intern. Other values are returned as they are.
+
+    :param name:
+    :return:
+    """
+    return sys.intern(name) if isinstance(name, str) else name
+
+
+class NameTable(object):
+    """
+    A table of strings, where every distinct string is stored once and is identified by a small integer id.
+
+    A table belongs to a single tree, snapshot or export, and goes away with it. The strings are not passed to
+    sys.intern, as they include open-vocabulary ones like word forms and sentences.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._names = []
+
+    def intern(self, name):
+        """
+        Interns a name, returning its id.
+
+        :param name:
+        :return: The id of the name
+        """
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._ids[name] = name_id
+            self._names.append(name)
+        return name_id
+
+    def get_name(self, name_id):
+        """
+        Gets the name of an id.
+
+        :param name_id:
+        :return: The name
+        """
+        return self._names[name_id]
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._ids
@@ -1,15 +1,60 @@
 import os
-import xml.etree.ElementTree as ET
-
-from typecraft_python.models import Text
+from collections import deque
 
+from norsourceparser.core.backends import get_backend, ElementTreeBackend, create_syntax_node, NORSOURCE_ROOT_TAG
+# The tag constants used to live in this module, and are still importable from here
+from norsourceparser.core.backends import NORSOURCE_SYNTAXTREE_TAG, NORSOURCE_NODE_TAGS  # noqa: F401
 from norsourceparser.core.config import config
-from norsourceparser.core.models import UnresolvedSyntaxTree, SyntaxNode, PosTreeContainer
+from norsourceparser.core.files import open_norsource
+from norsourceparser.core.models import PosTreeContainer, CompactSyntaxTree
 from norsourceparser.core.util import chunks
 
-NORSOURCE_ROOT_TAG = 'parse'
-NORSOURCE_SYNTAXTREE_TAG = 'syntax-tree'
-NORSOURCE_NODE_TAGS = ['terminal', 'node']
+# The number of <parse> elements sent to a worker process in a single task
+WORKER_BATCH_SIZE = 16
+# The number of batches each worker may have queued up before we wait for results
+WORKER_PENDING_BATCHES = 2
+
+
+def iter_parse_records(filename, backend=None, syntax_tree=True):
+    """
+    Streams a Norsource XML file through an XML backend, yielding a ParseRecord for every <parse> element as soon as
+    it has been closed. Only a single <parse> element is held in memory at any time.
+
+    :param filename: A file path (or file object) to a norsource file
+    :param backend: The name of the XML backend to use. Defaults to config.XML_BACKEND
+    :param syntax_tree: If False, <syntax-tree> elements are skipped, and the records only carry the input and
+                        posTree. No SyntaxNodes are built
+    :return: A generator of ParseRecords
+    """
+    with open_norsource(filename) as fp:
+        for record in get_backend(backend).iter_records(fp, syntax_tree):
+            yield record
+
+
+def _init_worker(settings):
+    """
+    Worker initializer. Applies the configuration of the parent process, which a worker only inherits if it is forked,
+    and sizes the caches accordingly.
+
+    :param settings: A dict returned by config.snapshot
+    :return: void
+    """
+    from norsourceparser.core.rules import set_branch_cache_size
+    from norsourceparser.core.util import set_lookup_cache_size
+
+    config.update(settings)
+    set_branch_cache_size(config.BRANCH_CACHE_SIZE)
+    set_lookup_cache_size(config.LOOKUP_CACHE_SIZE)
+
+
+def _convert_records(records):
+    """
+    Worker entry point. Converts a batch of ParseRecords into Typecraft Phrases.
+
+    :param records: A list of ParseRecords
+    :return: A list of Typecraft Phrases (or None for records without a syntax-tree)
+    """
+    return [Parser.convert_record(record) for record in records]
 
 
 class PosTreeParser(object):
@@ -46,7 +91,7 @@ class PosTreeParser(object):
         :param string_content:
         :return:
         """
-        element_tree = ET.fromstring(string_content)
+        element_tree = get_backend().fromstring(string_content)
         return PosTreeParser.create_pos_tree_container_from_etree(element_tree)
 
     @staticmethod
@@ -57,9 +102,42 @@ class PosTreeParser(object):
         :param filename:
         :return:
         """
-        element_tree = ET.parse(filename)
+        with open_norsource(filename) as fp:
+            element_tree = get_backend().parse(fp)
         return PosTreeParser.create_pos_tree_container_from_etree(element_tree)
 
+    @staticmethod
+    def iter_phrases(filename):
+        """
+        Streams a Norsource resource in file-form through the posTree pipeline, yielding a POS-tagged Typecraft
+        Phrase for every <parse> element as soon as the element has been closed. Elements are released right
+        after conversion, so arbitrarily large files are handled in constant memory.
+
+        :param filename: A file path (or file object) to a norsource file
+        :return: A generator of Typecraft Phrases
+        """
+        for record in iter_parse_records(filename, syntax_tree=False):
+            if record.input is None or record.pos_tree is None:
+                continue
+
+            input, pos_tree = record.input, record.pos_tree
+            yield PosTreeContainer.convert_pair_to_tc(input, PosTreeContainer.resolve_pos_tree(pos_tree))
+
+    @staticmethod
+    def parse_element(parse_el):
+        """
+        Extracts the (input, posTree) pair from a single <parse> element. Returns None if either is missing.
+
+        :param parse_el: An ElementTree element representing a <parse> node.
+        :return: A tuple of (input, posTree) contents
+        """
+        input_el = parse_el.find('input')
+        pos_tree_el = parse_el.find('posTree')
+        if input_el is None or pos_tree_el is None:
+            return None
+
+        return input_el.text, pos_tree_el.text
+
     @staticmethod
     def create_pos_tree_container_from_etree(element_tree):
         """
@@ -72,14 +150,12 @@ class PosTreeParser(object):
         pos_tree_container = PosTreeContainer()
         root_el = element_tree.getroot()
 
-        for parse_el in root_el.iter('parse'):
-            input_el = parse_el.find('input')
-            pos_tree_el = parse_el.find('posTree')
-            if input_el is None or pos_tree_el is None:
+        for parse_el in root_el.iter(NORSOURCE_ROOT_TAG):
+            pair = PosTreeParser.parse_element(parse_el)
+            if pair is None:
                 continue
 
-            input = input_el.text
-            pos_tree = pos_tree_el.text
+            input, pos_tree = pair
             pos_tree_container.add_pair(input, pos_tree)
 
         return pos_tree_container
@@ -99,13 +175,18 @@ class Parser(object):
         return Parser.parse_element_tree(element_tree)
 
     @staticmethod
-    def parse_file(norsource):
+    def parse_file(norsource, workers=1, cache=None):
         """
         This method parses a Norsource XML represented as a file-path, into a Typecraft text object.
 
         :param (String) norsource: A file path to a norsource file
+        :param (int) workers: The number of processes to spread the sentences across
+        :param (PhraseCache) cache: A cache of already converted phrases
         :return Text: A Typecraft Text
         """
+        if workers > 1 or cache is not None:
+            return Parser.create_texts(list(Parser.iter_phrases(norsource, workers=workers, cache=cache)))
+
         element_tree = Parser.load_file(norsource)
         return Parser.parse_element_tree(element_tree)
 
@@ -115,7 +196,7 @@ class Parser(object):
         This method takes a string representing a Norsource XML file, and creates from it a SyntaxTree.
         :return:
         """
-        return ET.fromstring(string)
+        return get_backend().fromstring(string)
 
     @staticmethod
     def load_file(filename):
@@ -124,7 +205,117 @@ class Parser(object):
         :param filename:
         :return:
         """
-        return ET.parse(filename)
+        with open_norsource(filename) as fp:
+            return get_backend().parse(fp)
+
+    @staticmethod
+    def iter_phrases(filename, workers=1, cache=None):
+        """
+        This method streams a Norsource XML file, yielding a Typecraft Phrase for every <parse> element as soon as
+        the element has been closed. Each element is cleared after it has been converted, so memory usage stays
+        flat regardless of the size of the file.
+
+        :param filename: A file path (or file object) to a norsource file
+        :param (int) workers: The number of processes to spread the sentences across
+        :param (PhraseCache) cache: A cache of already converted phrases. Only sentences missing from the cache
+                                    are converted, and are then added to it
+        :return: A generator of Typecraft Phrases
+        """
+        if workers > 1:
+            for phrase in Parser._iter_phrases_parallel(filename, workers, cache):
+                yield phrase
+            return
+
+        if cache is not None:
+            # sqlite3 is only imported once a cache is used
+            from norsourceparser.core.cache import get_record_key
+
+        for record in iter_parse_records(filename):
+            key = phrase = None
+            if cache is not None:
+                key = get_record_key(record)
+                phrase = cache.get(key)
+
+            if phrase is None:
+                phrase = Parser.convert_record(record)
+                if phrase is not None and cache is not None:
+                    cache.put(key, phrase)
+
+            if phrase is not None:
+                yield phrase
+
+        if cache is not None:
+            cache.commit()
+
+    @staticmethod
+    def _iter_phrases_parallel(filename, workers, cache=None):
+        """
+        Spreads the <parse> elements of a Norsource XML file across a pool of worker processes. Every sentence is
+        independent, so batches of ParseRecords are converted in parallel and collected in their original
+        order. At most WORKER_PENDING_BATCHES batches per worker are in flight at any time, which keeps memory
+        bounded for large files.
+
+        :param filename: A file path (or file object) to a norsource file
+        :param (int) workers: The number of worker processes
+        :param (PhraseCache) cache: A cache of already converted phrases
+        :return: A generator of Typecraft Phrases
+        """
+        # multiprocessing takes a while to import, and is only needed here
+        import multiprocessing
+        if cache is not None:
+            from norsourceparser.core.cache import get_record_key
+
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config.snapshot(),))
+        # Every pending entry holds the async result of the converted records, as well as a
+        # list of (key, phrase) pairs in the original order, where phrase is None if it is still being converted.
+        pending = deque()
+
+        def submit(batch):
+            records = [record for _, phrase, record in batch if phrase is None]
+            result = pool.apply_async(_convert_records, (records,)) if len(records) > 0 else None
+            pending.append((result, [(key, phrase) for key, phrase, _ in batch]))
+
+        def collect():
+            result, entries = pending.popleft()
+            converted = iter(result.get() if result is not None else [])
+            for key, phrase in entries:
+                if phrase is None:
+                    phrase = next(converted)
+                    if phrase is not None and cache is not None:
+                        cache.put(key, phrase)
+                if phrase is not None:
+                    yield phrase
+
+        try:
+            batch = []
+            for record in iter_parse_records(filename):
+                key = phrase = None
+                if cache is not None:
+                    key = get_record_key(record)
+                    phrase = cache.get(key)
+                batch.append((key, phrase, record if phrase is None else None))
+                if len(batch) < WORKER_BATCH_SIZE:
+                    continue
+
+                submit(batch)
+                batch = []
+                while len(pending) >= workers * WORKER_PENDING_BATCHES:
+                    for phrase in collect():
+                        yield phrase
+
+            if len(batch) > 0:
+                submit(batch)
+
+            while len(pending) > 0:
+                for phrase in collect():
+                    yield phrase
+
+            if cache is not None:
+                cache.commit()
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
 
     @staticmethod
     def parse_element_tree(element_tree):
@@ -132,48 +323,158 @@ class Parser(object):
         This is the first of the heavy-duty parsing methods. It takes an xml.ElementTree, and parses this into a
         SyntaxTree.
 
-        :param (ElementTree) element_tree: An ElementTree representation of a Norsource file.
+        :param (ElementTree) element_tree: An ElementTree (or root Element) representation of a Norsource file.
         :return:
         """
-        root = element_tree.getroot()
-        text = Text()
-        text.language = 'nob'
+        # Parser.load gives us the root Element rather than an ElementTree
+        root = element_tree.getroot() if hasattr(element_tree, 'getroot') else element_tree
         phrases = []
-        for element in root.iter('parse'):
-            syntax_tree_et = element.find('syntax-tree')
-            if syntax_tree_et is None:
-                print("Warning: Missing <syntax-tree> node. This node cannot be omitted")
-                continue
+        for element in root.iter(NORSOURCE_ROOT_TAG):
+            phrase = Parser.parse_element(element)
+            if phrase is not None:
+                phrases.append(phrase)
 
-            input_et = element.find('input')
+        return Parser.create_texts(phrases)
 
-            # Okey, the document is well-formed (enough), lets start parsing
-            top = syntax_tree_et.attrib.get('top')
-            u_syntax_tree = UnresolvedSyntaxTree(top=top)
-            for node_et in syntax_tree_et:
-                if node_et.tag not in NORSOURCE_NODE_TAGS:
-                    raise Exception("Critical error parsing file: Found unknown element of type %s" % node_et.name)
-                u_syntax_tree.add_node(Parser._parse_et_node_to_syntax_node(node_et))
+    @staticmethod
+    def parse_element(element):
+        """
+        Parses a single <parse> element into a Typecraft Phrase. Returns None if the element does not contain
+        a syntax-tree.
 
-            phrase = u_syntax_tree.resolve().reduce().convert_to_tc()
+        :param (Element) element: An ElementTree element representing a <parse> node.
+        :return Phrase: A Typecraft Phrase
+        """
+        return Parser.convert_record(ElementTreeBackend.record_from_element(element))
 
-            if input_et is not None:
-                phrase.phrase = input_et.text
-            phrases.append(phrase)
+    @staticmethod
+    def convert_record(record):
+        """
+        Converts a ParseRecord into a Typecraft Phrase. Returns None if the record does not contain a syntax-tree.
+
+        :param (ParseRecord) record: The contents of a <parse> node.
+        :return Phrase: A Typecraft Phrase
+        """
+        view = Parser.convert_record_view(record)
+        if view is None:
+            return None
+        return view.to_tc()
+
+    @staticmethod
+    def convert_record_view(record):
+        """
+        Converts a ParseRecord into a ReducedPhraseView, without building any Typecraft objects. Returns None if the
+        record does not contain a syntax-tree.
+
+        :param (ParseRecord) record: The contents of a <parse> node.
+        :return ReducedPhraseView:
+        """
+        if record.syntax_tree is None:
+            print("Warning: Missing <syntax-tree> node. This node cannot be omitted")
+            return None
+
+        syntax_tree = record.syntax_tree
+        if not isinstance(syntax_tree, CompactSyntaxTree):
+            syntax_tree = CompactSyntaxTree.from_syntax_tree(syntax_tree)
+
+        view = syntax_tree.reduce().view()
+
+        if record.input is not None:
+            view.phrase = record.input
+        return view
+
+    @staticmethod
+    def iter_snapshot_phrases(filename):
+        """
+        Converts the records of a snapshot written by norsourceparser.core.snapshot.write_snapshot, yielding a
+        Typecraft Phrase for every record. No XML is parsed, so this is the fast path when iterating on the rules.
+
+        :param filename: The path of a snapshot
+        :return: A generator of Typecraft Phrases
+        """
+        from norsourceparser.core.snapshot import SnapshotReader
+
+        with SnapshotReader(filename) as snapshot:
+            for record in snapshot:
+                phrase = Parser.convert_record(record)
+                if phrase is not None:
+                    yield phrase
+
+    @staticmethod
+    def iter_phrase_views(filename):
+        """
+        Streams a Norsource XML file like iter_phrases, but yields a ReducedPhraseView for every <parse> element.
+        This is the cheap option for consumers only needing the words and their POS tags.
+
+        :param filename: A file path (or file object) to a norsource file
+        :return: A generator of ReducedPhraseViews
+        """
+        for record in iter_parse_records(filename):
+            view = Parser.convert_record_view(record)
+            if view is not None:
+                yield view
 
-        # Create texts
+    @staticmethod
+    def create_texts(phrases):
+        """
+        Groups a list of phrases into Typecraft Texts, respecting config.MAX_PHRASES_PER_TEXT.
 
+        :param phrases: A list of Typecraft Phrases
+        :return: A list of Typecraft Texts
+        """
         phrases_per_text = config.MAX_PHRASES_PER_TEXT if config.MAX_PHRASES_PER_TEXT != -1 else len(phrases)
         chunked_phrases = chunks(phrases, phrases_per_text)
-        texts = []
-        for chunk in chunked_phrases:
-            text = Text()
-            text.language = 'nob'
-            for phrase in chunk:
-                text.add_phrase(phrase)
-            texts.append(text)
+        return [Parser.create_text(chunk) for chunk in chunked_phrases]
+
+    @staticmethod
+    def create_text(phrases):
+        """
+        Creates a single Typecraft Text containing the given phrases.
+
+        :param phrases: A list of Typecraft Phrases
+        :return Text: A Typecraft Text
+        """
+        # typecraft_python pulls in yaml, and is only imported once we convert
+        from typecraft_python.models import Text
+
+        text = Text()
+        text.language = 'nob'
+        for phrase in phrases:
+            text.add_phrase(phrase)
 
-        return texts
+        return text
+
+    @staticmethod
+    def iter_texts(filename, workers=1, cache=None):
+        """
+        Streams a Norsource XML file, yielding a Typecraft Text as soon as config.MAX_PHRASES_PER_TEXT phrases
+        have been converted. If MAX_PHRASES_PER_TEXT is -1, a single Text is yielded once the file is exhausted, so
+        all phrases are held in memory. TextWriter.write_phrases writes the same output one phrase at a time.
+
+        :param filename: A file path (or file object) to a norsource file
+        :param (int) workers: The number of processes to spread the sentences across
+        :param (PhraseCache) cache: A cache of already converted phrases
+        :return: A generator of Typecraft Texts
+        """
+        return Parser.group_texts(Parser.iter_phrases(filename, workers=workers, cache=cache))
+
+    @staticmethod
+    def group_texts(stream):
+        """
+        Groups a stream of phrases into Typecraft Texts of at most config.MAX_PHRASES_PER_TEXT phrases.
+
+        :param stream: An iterable of Typecraft Phrases
+        :return: A generator of Typecraft Texts
+        """
+        phrases = []
+        for phrase in stream:
+            phrases.append(phrase)
+            if len(phrases) == config.MAX_PHRASES_PER_TEXT:
+                yield Parser.create_text(phrases)
+                phrases = []
+
+        if len(phrases) > 0:
+            yield Parser.create_text(phrases)
 
     @staticmethod
     def _parse_et_node_to_syntax_node(et_node):
@@ -182,15 +483,4 @@ class Parser(object):
         :param (ElementTree) et_node:
         :return (SyntaxNode):
         """
-        attributes = et_node.attrib
-        return SyntaxNode(
-            id=attributes.get('id'),
-            name=attributes.get('name'),
-            beg=attributes.get('beg'),
-            end=attributes.get('end'),
-            parent_id=attributes.get('parent'),
-            num=attributes.get('num'),
-            pct=attributes.get('pct'),
-            is_terminal=et_node.tag == 'terminal'
-        )
-
+        return create_syntax_node(et_node.tag, et_node.attrib)
@@ -10,8 +10,9 @@ from norsourceparser.core.constants import REDUCED_RULE_POS, REDUCED_RULE_GLOSSE
     REDUCED_RULE_VALENCY, REDUCED_RULE_CITATION_FORM, REDUCED_RULE_CONSTRUCTION_FORM, REDUCED_RULE_PRIORITY_AMBIGUOUS, \
     REDUCED_RULE_PRIORITY_MERGE, REDUCED_RULE_PRIORITY_DOMINATE
 from norsourceparser.core.util import get_pos, get_inflectional_rules, get_valency, get_dominating_pos_rule, \
-    get_dominating_gloss_rule
+    get_dominating_gloss_rule, lookup_caches
 from norsourceparser.core.util import split_lexical_entry, get_gloss
+from norsourceparser.core.lru import LRUCache
 
 
 class Rule(object):
@@ -29,6 +30,144 @@ class Rule(object):
         return u"%d %s (Priority %d)" % (self.rule_id, self.value, self.priority)
 
 
+# Rules inferred from a branch only depend on the names of its nodes, and the same word forms carry the same
+# derivations all over a corpus. We therefore memoize the rules for every branch across sentences.
+branch_rule_cache = LRUCache(config.BRANCH_CACHE_SIZE)
+
+
+def set_branch_cache_size(size):
+    """
+    Sets the number of branches for which we memoize rules. 0 disables the cache.
+
+    :param size:
+    :return: void
+    """
+    config.BRANCH_CACHE_SIZE = size
+    branch_rule_cache.resize(size)
+
+
+class BranchNode(object):
+    """
+    A stand-in for a SyntaxNode, carrying nothing but the name. The rule functions only ever look at node names.
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class LexicalAnalysis(object):
+    """
+    The analysis of the lexical entry of a branch, i.e. the node right above the terminal. Every rule function
+    needs it, so it is computed once and handed to all of them.
+    """
+    __slots__ = ('terminal', 'lexical_entry', 'stem', 'pos', 'gloss', 'is_inflected')
+
+    def __init__(self, terminal, lexical_entry):
+        """
+        Analyses a lexical entry.
+
+        :param (String) terminal: The name of the terminal node
+        :param (String) lexical_entry: The name of the lexical entry node
+        """
+        [stem, pos, gloss] = split_lexical_entry(lexical_entry)
+        self.terminal = terminal
+        self.lexical_entry = lexical_entry
+        self.stem = stem
+        self.pos = get_pos(pos, None) or get_pos(lexical_entry, None)
+        self.gloss = get_gloss(gloss, None) or get_gloss(lexical_entry, None)
+        # True if the terminal is an inflected form containing the stem
+        self.is_inflected = stem != terminal and stem in terminal
+
+
+# The LexicalAnalysis of recently seen (terminal, lexical entry) pairs. It is one of the lookup caches, and is thus
+# sized by set_lookup_cache_size
+lexical_analysis_cache = LRUCache(config.LOOKUP_CACHE_SIZE)
+lookup_caches['analyse_lexical_entry'] = lexical_analysis_cache
+
+
+class NameFeatures(object):
+    """
+    The dominating POS and gloss mappings of a node name, which get_dominating_rules looks up for every branch.
+    """
+    __slots__ = ('dominating_pos', 'dominating_gloss')
+
+    def __init__(self, name):
+        """
+        Looks up the mappings of a node name.
+
+        :param (String) name:
+        """
+        self.dominating_pos = get_dominating_pos_rule(name)
+        self.dominating_gloss = get_dominating_gloss_rule(name)
+
+
+# The NameFeatures of recently seen rule names. It is one of the lookup caches, and is thus bounded and sized by
+# set_lookup_cache_size
+name_features_cache = LRUCache(config.LOOKUP_CACHE_SIZE)
+lookup_caches['get_name_features'] = name_features_cache
+
+
+def get_name_features(name):
+    """
+    Gets the NameFeatures of a node name. Names are memoized in name_features_cache.
+
+    :param (String) name:
+    :return (NameFeatures):
+    """
+    features = name_features_cache.get(name)
+    if features is None:
+        features = NameFeatures(name)
+        name_features_cache.put(name, features)
+    return features
+
+
+def analyse_lexical_entry(partial_branch):
+    """
+    Gets the LexicalAnalysis of a partial branch of at least two nodes. Analyses are memoized by the names of the
+    terminal and the lexical entry.
+
+    :param partial_branch: A list of branch-entries.
+    :return (LexicalAnalysis):
+    """
+    key = (partial_branch[0].name, partial_branch[1].name)
+    lexical = lexical_analysis_cache.get(key)
+    if lexical is None:
+        lexical = LexicalAnalysis(*key)
+        lexical_analysis_cache.put(key, lexical)
+    return lexical
+
+
+def get_cached_rules_from_partial_branch(partial_branch):
+    """
+    Memoized version of get_rules_from_partial_branch, keyed by the names along the branch.
+
+    :param partial_branch: A list of branch-entries.
+    :return: Array of rules
+    """
+    return get_cached_rules_from_names(tuple(node.name for node in partial_branch))
+
+
+def get_cached_rules_from_names(names):
+    """
+    Gets the rules of a partial branch given by the names of its nodes, from the terminal and up.
+
+    The cache stores plain (rule_id, value, priority) tuples, and hands out fresh Rule objects on every hit,
+    as ReducedNode.add_rule modifies the rules it is given.
+
+    :param names: A tuple of node names
+    :return: Array of rules
+    """
+    cached = branch_rule_cache.get(names)
+    if cached is None:
+        rules = get_rules_from_partial_branch([BranchNode(name) for name in names]) or []
+        cached = tuple((rule.rule_id, rule.value, rule.priority) for rule in rules)
+        branch_rule_cache.put(names, cached)
+
+    return [Rule(rule_id, list(value) if isinstance(value, list) else value, priority)
+            for rule_id, value, priority in cached]
+
+
 def get_rules_from_partial_branch(partial_branch):
     """
     This method is the main `entry-point` for inferring rules from a branch.
@@ -50,9 +189,8 @@ def get_rules_from_partial_branch(partial_branch):
 
     # With the terminal and second node, we can get information
     # from the lexical entry
-    [stem, pos, gloss] = split_lexical_entry(second_node.name)
-    pos = get_pos(pos, None) or get_pos(second_node.name, None)
-    gloss = get_gloss(gloss, None) or get_gloss(second_node.name, None)
+    lexical = analyse_lexical_entry(partial_branch)
+    stem, pos, gloss = lexical.stem, lexical.pos, lexical.gloss
 
     # If
     if len(partial_branch) == 2 and config.DEBUG:
@@ -74,14 +212,14 @@ def get_rules_from_partial_branch(partial_branch):
         # We look for the special case of a bli_pass case here
         rules.extend(get_bli_passive_rules(partial_branch))
     else:
-        rules.extend(get_gloss_rules_from_partial_branch(partial_branch))
-        rules.extend(get_dominating_rules(partial_branch))
+        rules.extend(get_gloss_rules_from_partial_branch(partial_branch, lexical))
+        rules.extend(get_dominating_rules(partial_branch, lexical))
 
         if pos == "N":
             # If the pos is a Noun, we look for the special noun inflectional rules
-            rules.extend(get_noun_inflectional_rule(partial_branch))
+            rules.extend(get_noun_inflectional_rule(partial_branch, lexical))
 
-    rules.extend(get_complex_rules(partial_branch))
+    rules.extend(get_complex_rules(partial_branch, lexical))
 
     return rules
 
@@ -137,7 +275,7 @@ def parse_lexical_entry(terminal, stem, pos, gloss):
     return rules
 
 
-def get_noun_inflectional_rule(partial_branch):
+def get_noun_inflectional_rule(partial_branch, lexical=None):
     """
     This method helps us to parse an inflectional rule for a noun.
 
@@ -148,6 +286,7 @@ def get_noun_inflectional_rule(partial_branch):
     If the POS of the branch is found not to be a noun, we simply return.
 
     :param partial_branch: A partial branch.
+    :param (LexicalAnalysis) lexical: The analysis of the lexical entry of the branch, if already computed
     :return: An array, potentially filled with rules.
     """
     rules = []
@@ -156,11 +295,10 @@ def get_noun_inflectional_rule(partial_branch):
 
     # Here we are looking for the inflectional rules for nouns
     last_node = partial_branch[-1]
-    lexical_node = partial_branch[1]
     terminal = partial_branch[0]
 
-    [stem, pos, _] = split_lexical_entry(lexical_node.name)
-    pos = get_pos(pos, None) or get_pos(lexical_node.name, None)
+    lexical = lexical or analyse_lexical_entry(partial_branch)
+    stem, pos = lexical.stem, lexical.pos
     if pos != 'N':
         return rules
 
@@ -194,26 +332,24 @@ def get_noun_inflectional_rule(partial_branch):
     return rules
 
 
-def get_gloss_rules_from_partial_branch(partial_tree):
+def get_gloss_rules_from_partial_branch(partial_tree, lexical=None):
     """
     Tries to get rules for something other than a verb, noun or adjective. We do this simply by doing a lookup
     in the non-inflectional table. This is of course all encapsulated in the get_gloss method, so we just call that,
     fishing for luck.
 
     :param partial_tree:
+    :param (LexicalAnalysis) lexical: The analysis of the lexical entry of the branch, if already computed
     :return: An array of rules
     """
     last_rule = partial_tree[-1].name
-    lexical_rule = partial_tree[1].name
-    terminal = partial_tree[0].name
-    [stem, pos, _] = split_lexical_entry(lexical_rule)
-    pos = get_pos(pos, None) or get_pos(lexical_rule, None)
+    lexical = lexical or analyse_lexical_entry(partial_tree)
 
     maybe_gloss = get_gloss(last_rule)
 
     if maybe_gloss is not None:
-        if pos in ['N', 'ADJ', 'V']:
-            if stem != terminal and stem in terminal:
+        if lexical.pos in ['N', 'ADJ', 'V']:
+            if lexical.is_inflected:
                 # This means we have some inflectional rule, and should
                 # add the gloss to the suffix
                 return [Rule(REDUCED_RULE_GLOSSES, ["", maybe_gloss], REDUCED_RULE_PRIORITY_MERGE)]
@@ -277,21 +413,20 @@ def get_verb_citform(partial_branch):
     return []
 
 
-def get_dominating_rules(partial_branch):
+def get_dominating_rules(partial_branch, lexical=None):
     last_rule = partial_branch[-1].name
-    lexical_rule = partial_branch[1].name
-    terminal = partial_branch[0].name
-    [stem, pos, _] = split_lexical_entry(lexical_rule)
-    pos = get_pos(pos, None) or get_pos(lexical_rule, None)
+    lexical = lexical or analyse_lexical_entry(partial_branch)
+
+    features = get_name_features(last_rule)
 
-    pos_rule = get_dominating_pos_rule(last_rule)
+    pos_rule = features.dominating_pos
     if pos_rule:
         return [Rule(REDUCED_RULE_POS, pos_rule, REDUCED_RULE_PRIORITY_DOMINATE)]
 
-    gloss_rule = get_dominating_gloss_rule(last_rule)
+    gloss_rule = features.dominating_gloss
     if gloss_rule:
-        if pos in ['N', 'ADJ', 'V']:
-            if stem != terminal and stem in terminal:
+        if lexical.pos in ['N', 'ADJ', 'V']:
+            if lexical.is_inflected:
                 # This means we have some inflectional rule, and should
                 # add the gloss to the suffix
                 return [Rule(REDUCED_RULE_GLOSSES, ["", gloss_rule], REDUCED_RULE_PRIORITY_DOMINATE)]
@@ -299,24 +434,23 @@ def get_dominating_rules(partial_branch):
     return []
 
 
-def get_complex_rules(partial_branch):
+def get_complex_rules(partial_branch, lexical=None):
     """
     Currently we only do a special case here.
 
     :param partial_branch:
+    :param (LexicalAnalysis) lexical: The analysis of the lexical entry of the branch, if already computed
     :return:
     """
     if len(partial_branch) < 4:
         return []
 
-    terminal = partial_branch[0].name
-    lexical = partial_branch[1]
     potential_pass = partial_branch[2]
     inflectional = partial_branch[3]
-    [stem, pos, _] = split_lexical_entry(lexical.name)
 
     if 'pass' in potential_pass.name and get_gloss(inflectional.name, '') == 'PRF':
-        if stem != terminal and stem in terminal:
+        lexical = lexical or analyse_lexical_entry(partial_branch)
+        if lexical.is_inflected:
             return [Rule(REDUCED_RULE_GLOSSES, ['', 'PASS.PTCP'], REDUCED_RULE_PRIORITY_DOMINATE)]
         return [Rule(REDUCED_RULE_GLOSSES, ['PASS.PTCP'], REDUCED_RULE_PRIORITY_DOMINATE)]
     return []
@@ -0,0 +1,206 @@
+"""
+This file contains a compact binary snapshot format for resolved syntax trees.
+
+A snapshot stores the ParseRecords of a Norsource file as CompactSyntaxTrees: A string table shared by every record
+(node names, inputs, posTrees and tops), a table of records, and the parent, name id and terminal columns of all
+trees concatenated. Reading a snapshot maps the file into memory, and the columns of every tree are views into the
+mapping, so re-running the rules over a corpus skips XML parsing entirely.
+
+Layout (native byte order, every section aligned to 4 bytes):
+
+    header      magic, byte order mark, format version, string count, record count, node count, string blob size
+    strings     int32 end offsets of every string but None, followed by the utf-8 string blob
+    records     int32 input id, posTree id, top id, first node, node count (first node is -1 if there is no tree)
+    nodes       int32 parents, int32 name ids, int8 terminal flags
+
+String id 0 is always None.
+"""
+import mmap
+import struct
+from array import array
+from itertools import compress
+
+from norsourceparser.core.backends import ParseRecord
+from norsourceparser.core.files import peek_magic
+from norsourceparser.core.models import CompactSyntaxTree
+from norsourceparser.core.names import NameTable, intern_name
+
+SNAPSHOT_MAGIC = b'NSNP'
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_BYTE_ORDER_MARK = 0x01020304
+
+_HEADER = struct.Struct('=4sIIIIII')
+_RECORD_FIELDS = 5
+
+
+def _padding(size):
+    return b'\0' * (-size % 4)
+
+
+def is_snapshot(filename):
+    """
+    Checks if a file is a syntax tree snapshot.
+
+    :param filename: A file path, or a binary file object, which is not consumed
+    :return: True or False
+    """
+    if hasattr(filename, 'read'):
+        return peek_magic(filename, len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+
+    with open(filename, 'rb') as fp:
+        return fp.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+
+
+def write_snapshot(records, filename):
+    """
+    Writes ParseRecords to a snapshot file.
+
+    :param records: An iterable of ParseRecords
+    :param filename: The path of the snapshot
+    :return: The number of records written
+    """
+    strings = NameTable()
+    strings.intern(None)
+
+    record_table = array('i')
+    parents = array('i')
+    name_ids = array('i')
+    terminals = array('b')
+
+    for record in records:
+        record_table.append(strings.intern(record.input))
+        record_table.append(strings.intern(record.pos_tree))
+
+        if record.syntax_tree is None:
+            record_table.extend([0, -1, 0])
+            continue
+
+        # Resolving the tree into the string table makes its name ids valid ids of the table
+        compact = CompactSyntaxTree.from_syntax_tree(record.syntax_tree, names=strings)
+        record_table.extend([strings.intern(compact.top), len(parents), len(compact)])
+        parents.extend(compact.parents)
+        name_ids.extend(compact.name_ids)
+        terminals.extend(compact.terminals)
+
+    blob = bytearray()
+    offsets = array('i', [0])
+    for string_id in range(1, len(strings)):
+        blob.extend(strings.get_name(string_id).encode('utf-8'))
+        offsets.append(len(blob))
+
+    with open(filename, 'wb') as fp:
+        fp.write(_HEADER.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_BYTE_ORDER_MARK,
+            SNAPSHOT_FORMAT_VERSION,
+            len(strings),
+            len(record_table) // _RECORD_FIELDS,
+            len(parents),
+            len(blob)
+        ))
+        fp.write(offsets.tobytes())
+        fp.write(bytes(blob))
+        fp.write(_padding(len(blob)))
+        fp.write(record_table.tobytes())
+        fp.write(parents.tobytes())
+        fp.write(name_ids.tobytes())
+        fp.write(terminals.tobytes())
+
+    return len(record_table) // _RECORD_FIELDS
+
+
+class SnapshotReader(object):
+    """
+    Reads a snapshot file through a memory mapping. Records are read on demand, and the columns of their trees are
+    views into the mapping.
+    """
+
+    def __init__(self, filename):
+        """
+        Opens a snapshot.
+
+        :param filename: A file path, or a binary file object backed by a file
+        """
+        if hasattr(filename, 'fileno'):
+            self.filename = getattr(filename, 'name', filename)
+            self._mmap = mmap.mmap(filename.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.filename = filename
+            with open(filename, 'rb') as fp:
+                self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+
+        header = _HEADER.unpack_from(self._buffer, 0)
+        magic, byte_order_mark, version, string_count, record_count, node_count, blob_size = header
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("%s is not a syntax tree snapshot" % self.filename)
+        if byte_order_mark != SNAPSHOT_BYTE_ORDER_MARK:
+            raise ValueError("%s was written on a machine with a different byte order" % self.filename)
+        if version != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError("%s has an unsupported snapshot format version %d" % (self.filename, version))
+
+        position = _HEADER.size
+        offsets = self._buffer[position:position + 4 * string_count].cast('i')
+        position += 4 * string_count
+        blob = self._buffer[position:position + blob_size]
+        position += blob_size + len(_padding(blob_size))
+
+        self._records = self._buffer[position:position + 4 * _RECORD_FIELDS * record_count].cast('i')
+        position += 4 * _RECORD_FIELDS * record_count
+        self._parents = self._buffer[position:position + 4 * node_count].cast('i')
+        position += 4 * node_count
+        self._name_ids = self._buffer[position:position + 4 * node_count].cast('i')
+        position += 4 * node_count
+        self._terminals = self._buffer[position:position + node_count].cast('b')
+
+        # The strings are kept in the table of this snapshot. Only the names of non-terminal nodes are interned, as
+        # create_syntax_node does, while inputs, posTrees and word forms are left as they are
+        rule_name_ids = set(compress(self._name_ids, [not is_terminal for is_terminal in self._terminals]))
+        self.names = NameTable()
+        self.names.intern(None)
+        for string_id in range(1, string_count):
+            string = bytes(blob[offsets[string_id - 1]:offsets[string_id]]).decode('utf-8')
+            self.names.intern(intern_name(string) if string_id in rule_name_ids else string)
+
+    def __getitem__(self, index):
+        """
+        Reads a record.
+
+        :param index:
+        :return (ParseRecord): A record, where the syntax_tree is a CompactSyntaxTree
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        start = index * _RECORD_FIELDS
+        input_id, pos_tree_id, top_id, first_node, node_count = self._records[start:start + _RECORD_FIELDS]
+        record = ParseRecord(input=self.names.get_name(input_id), pos_tree=self.names.get_name(pos_tree_id))
+        if first_node != -1:
+            tree = CompactSyntaxTree(top=self.names.get_name(top_id), names=self.names)
+            tree.parents = self._parents[first_node:first_node + node_count]
+            tree.name_ids = self._name_ids[first_node:first_node + node_count]
+            tree.terminals = self._terminals[first_node:first_node + node_count]
+            record.syntax_tree = tree
+        return record
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __len__(self):
+        return len(self._records) // _RECORD_FIELDS
+
+    def close(self):
+        for view in [self._records, self._parents, self._name_ids, self._terminals, self._buffer]:
+            view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Trees read from the snapshot still reference the mapping. It is unmapped once they are collected
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
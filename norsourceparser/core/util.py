@@ -1,22 +1,137 @@
 # coding=utf-8
 import os
 import json
-import re
 
 from norsourceparser.core.config import config
+from norsourceparser.core.lru import LRUCache
+from norsourceparser.core.names import intern_name
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), '../resources')
+_resources_version = None
+
+
+def intern_keys(mapping):
+    """
+    Interns the keys of a dict, so looking them up with interned node names short-circuits on identity.
+
+    :param mapping:
+    :return: A new dict
+    """
+    return dict((intern_name(key), value) for key, value in mapping.items())
+
 
 def open_resources_file(name):
-    fp = open(os.path.join(os.path.dirname(__file__), '../resources/%s.json' % name), 'r')
-    return json.load(fp)
-
-verb_lex = open_resources_file('verb_lex')
-verb_corrlist = open_resources_file('verb_corrlist')
-noun_inflections = open_resources_file('noun_inflections')
-gloss = open_resources_file('gloss')
-meanings = open_resources_file('meanings')
-pos = open_resources_file('pos')
-concatenation_superfluity = open_resources_file('concatenation_superfluity')
-dominating_mappings = open_resources_file('dominating_mappings')
+    fp = open(os.path.join(RESOURCES_DIR, '%s.json' % name), 'r')
+    return intern_keys(json.load(fp))
+
+
+def get_resources_version():
+    """
+    Returns a hash of the contents of all resource files. It changes whenever any of the resources change.
+
+    :return: A hex digest
+    """
+    global _resources_version
+    if _resources_version is None:
+        # hashlib loads OpenSSL, which is too slow to pay for on every import
+        import hashlib
+        digest = hashlib.sha1()
+        for name in sorted(os.listdir(RESOURCES_DIR)):
+            if not name.endswith('.json'):
+                continue
+            digest.update(name.encode('utf-8'))
+            with open(os.path.join(RESOURCES_DIR, name), 'rb') as fp:
+                digest.update(fp.read())
+        _resources_version = digest.hexdigest()
+    return _resources_version
+
+
+class ResourceRegistry(object):
+    """
+    A registry of resources, each loaded on first access. Importing the parser thus costs nothing until a
+    resource is actually needed, and the pos mode never loads the ones it does not use.
+
+        resources.register('gloss', lambda: open_resources_file('gloss'))
+        resources.gloss  # Loads gloss.json
+    """
+
+    def __init__(self):
+        self._loaders = {}
+
+    def register(self, name, loader):
+        """
+        Registers a resource.
+
+        :param name: The name of the resource
+        :param loader: A function without arguments returning the resource
+        :return: void
+        """
+        self._loaders[name] = loader
+        self.__dict__.pop(name, None)
+
+    def load_all(self):
+        """
+        Loads every registered resource, for long-running processes preferring to pay the cost up front.
+
+        :return: void
+        """
+        for name in list(self._loaders):
+            getattr(self, name)
+
+    def is_loaded(self, name):
+        return name in self.__dict__
+
+    def __contains__(self, name):
+        return name in self._loaders
+
+    def __getattr__(self, name):
+        # Only called for resources not loaded yet. Once loaded, a resource is a plain instance attribute
+        loaders = self.__dict__.get('_loaders', {})
+        if name not in loaders:
+            raise AttributeError(name)
+        resource = loaders[name]()
+        setattr(self, name, resource)
+        return resource
+
+
+def get_bundle_path():
+    """
+    Returns the path of the compiled resource bundle, see norsourceparser.core.bundle.
+
+    :return:
+    """
+    from norsourceparser.core.bundle import BUNDLE_FILENAME
+    return config.RESOURCES_BUNDLE or os.path.normpath(os.path.join(RESOURCES_DIR, BUNDLE_FILENAME))
+
+
+def _open_bundle():
+    # The bundle module pulls in mmap, struct and zlib, so it is imported on first access to a resource
+    from norsourceparser.core.bundle import open_bundle
+    return open_bundle(get_bundle_path(), RESOURCES_DIR, get_resources_version)
+
+
+def load_resource(name):
+    """
+    Loads a resource from the compiled resource bundle, falling back to its JSON file if the bundle is missing,
+    stale or does not contain it.
+
+    :param name:
+    :return: A dict, or a read-only MappedTable if the resource comes from the bundle
+    """
+    bundle = resources.bundle
+    if bundle is not None and name in bundle:
+        return bundle.get_table(name)
+    return open_resources_file(name)
+
+
+resources = ResourceRegistry()
+resources.register('bundle', _open_bundle)
+for _name in ['verb_lex', 'verb_corrlist', 'noun_inflections', 'gloss', 'meanings', 'pos',
+              'concatenation_superfluity']:
+    resources.register(_name, lambda name=_name: load_resource(name))
+resources.register('dominating_mappings', lambda: dict(
+    (intern_name(key), intern_keys(value)) for key, value in load_resource('dominating_mappings').items()
+))
 
 POS_CONVERSIONS = {
     "copnom": "COP",
@@ -44,13 +159,53 @@ GLOSS_CONVERSIONS = {
 }
 
 
-def get_gloss(rule, default=None):
-    if rule is None:
-        return default
+# Marks a rule which get_gloss, get_pos or get_valency found nothing for. These are cached as well
+_NOT_FOUND = object()
+# Marks a rule missing from a lookup cache
+_NOT_CACHED = object()
+
+lookup_caches = {
+    'get_gloss': LRUCache(config.LOOKUP_CACHE_SIZE),
+    'get_pos': LRUCache(config.LOOKUP_CACHE_SIZE),
+    'get_valency': LRUCache(config.LOOKUP_CACHE_SIZE),
+}
+
+
+def set_lookup_cache_size(size):
+    """
+    Sets the number of rules for which get_gloss, get_pos, get_valency, rules.get_name_features and
+    rules.analyse_lexical_entry each memoize their result. 0 disables the caches.
+
+    :param size:
+    :return: void
+    """
+    config.LOOKUP_CACHE_SIZE = size
+    for cache in lookup_caches.values():
+        cache.resize(size)
+
+
+def get_lookup_cache_stats():
+    """
+    Returns the counters of the lookup caches.
+
+    :return: A dict of LRUCache stats, keyed by function name
+    """
+    return dict((name, cache.stats()) for name, cache in lookup_caches.items())
+
+
+def _memoized_lookup(cache, lookup, rule):
+    value = cache.get(rule, _NOT_CACHED)
+    if value is _NOT_CACHED:
+        value = lookup(rule)
+        cache.put(rule, value)
+    return value
+
+
+def _lookup_gloss(rule):
     if rule in GLOSS_CONVERSIONS:
         return GLOSS_CONVERSIONS[rule]
-    elif rule in gloss:
-        return gloss[rule]
+    elif rule in resources.gloss:
+        return resources.gloss[rule]
     else:
         # Time for special-cases
         if rule.rsplit("-").pop() == '-pn':
@@ -61,18 +216,24 @@ def get_gloss(rule, default=None):
         # Okey, lets try to match it against an end rule in our non-inflectional lookup
         rule_splitted = rule.rsplit("_")
         if len(rule_splitted) < 2:
-            return default
+            return _NOT_FOUND
 
-        return gloss.get('_' + rule_splitted[-1], default)
+        return resources.gloss.get('_' + rule_splitted[-1], _NOT_FOUND)
 
 
-def get_pos(rule, default=None):
+def get_gloss(rule, default=None):
     if rule is None:
         return default
+
+    value = _memoized_lookup(lookup_caches['get_gloss'], _lookup_gloss, rule)
+    return default if value is _NOT_FOUND else value
+
+
+def _lookup_pos(rule):
     if rule in POS_CONVERSIONS:
         return POS_CONVERSIONS[rule]
-    elif rule in pos:
-        return pos[rule]
+    elif rule in resources.pos:
+        return resources.pos[rule]
     else:
         # Time for special-cases
 
@@ -85,9 +246,36 @@ def get_pos(rule, default=None):
         rule_splitted = rule.rsplit("_")
 
         if len(rule_splitted) < 2:
-            return default
+            return _NOT_FOUND
+
+        return resources.pos.get('_' + rule_splitted[-1], _NOT_FOUND)
+
+
+def get_pos(rule, default=None):
+    if rule is None:
+        return default
+
+    value = _memoized_lookup(lookup_caches['get_pos'], _lookup_pos, rule)
+    return default if value is _NOT_FOUND else value
 
-        return pos.get('_' + rule_splitted[-1], default)
+
+def _lookup_valency(rule):
+    verb_lex = resources.verb_lex
+    verb_corrlist = resources.verb_corrlist
+
+    lex_corr = None
+    if rule in verb_lex:
+        lex_corr = verb_lex[rule]
+    elif rule.replace('_vlxm', '') in verb_lex:
+        lex_corr = verb_lex[rule.replace('_vlxm', '')]
+    else:
+        return _NOT_FOUND, lex_corr
+
+    if not lex_corr in verb_corrlist:
+        if config.DEBUG:
+            print("UNABLE TO FIND VALENCY_MAPPING FOR %s in CORRLIST" % lex_corr)
+        return _NOT_FOUND, lex_corr
+    return verb_corrlist[lex_corr], lex_corr
 
 
 def get_valency(rule, default=None):
@@ -99,25 +287,11 @@ def get_valency(rule, default=None):
     :param default:
     :return:
     """
-    lex_corr = None
     if rule is None:
-        return default, lex_corr
-    elif rule in verb_lex:
-        lex_corr = verb_lex[rule]
-        if not lex_corr in verb_corrlist:
-            if config.DEBUG:
-                print("UNABLE TO FIND VALENCY_MAPPING FOR %s in CORRLIST" % lex_corr)
-            return default, lex_corr
-        return verb_corrlist[lex_corr], lex_corr
-    elif rule.replace('_vlxm', '') in verb_lex:
-        lex_corr = verb_lex[rule.replace('_vlxm', '')]
-        if not lex_corr in verb_corrlist:
-            if config.DEBUG:
-                print("UNABLE TO FIND VALENCY_MAPPING FOR %s in CORRLIST" % lex_corr)
-            return default, lex_corr
-        return verb_corrlist[lex_corr], lex_corr
+        return default, None
 
-    return default, lex_corr
+    valency, lex_corr = _memoized_lookup(lookup_caches['get_valency'], _lookup_valency, rule)
+    return default if valency is _NOT_FOUND else valency, lex_corr
 
 
 def split_lexical_entry(name):
@@ -142,11 +316,86 @@ def split_lexical_entry(name):
     return [stem, pos, gloss]
 
 
+class SuffixTrie(object):
+    """
+    A trie of reversed strings, finding the longest key which is a suffix of a string in a single walk from its end.
+    """
+    __slots__ = ('_root',)
+
+    # Marks the entry of a key in a trie node. It cannot collide with a character, as it is not a string
+    _ENTRY = None
+
+    def __init__(self, mapping=None):
+        self._root = {}
+        for key, value in (mapping or {}).items():
+            self.add(key, value)
+
+    def add(self, key, value):
+        """
+        Adds a key.
+
+        :param key: The suffix
+        :param value:
+        :return: void
+        """
+        node = self._root
+        for character in reversed(key):
+            node = node.setdefault(character, {})
+        node[self._ENTRY] = (key, value)
+
+    def longest_suffix(self, string):
+        """
+        Finds the longest key which is a suffix of a string.
+
+        :param string:
+        :return: A (key, value) tuple, or None if no key is a suffix of the string
+        """
+        node = self._root
+        match = node.get(self._ENTRY)
+        for character in reversed(string):
+            node = node.get(character)
+            if node is None:
+                break
+            match = node.get(self._ENTRY, match)
+        return match
+
+
+def compile_noun_inflections(inflections):
+    """
+    Compiles the noun inflection tables into (glosses, suffix trie, default) tuples, where the default is the
+    [Stem-Suffix, Suffix] pair of the "*" key, if any. A rule without suffixes is compiled with a None trie.
+
+    :param inflections: The noun inflection tables as loaded from noun_inflections.json
+    :return: A dict of compiled rules
+    """
+    compiled = {}
+    for rule, inflectional_rules in inflections.items():
+        glosses = [GLOSS_CONVERSIONS[attribute] for attribute in inflectional_rules.get('attributes').values()
+                   if attribute in GLOSS_CONVERSIONS]
+
+        suffix_rules = inflectional_rules.get('suffix')
+        if suffix_rules is None:
+            compiled[rule] = (glosses, None, None)
+            continue
+
+        suffix_rules = dict(suffix_rules)
+        default = None
+        if "*" in suffix_rules:
+            default = ["*", suffix_rules.pop("*")]
+        compiled[rule] = (glosses, SuffixTrie(suffix_rules), default)
+    return compiled
+
+
+resources.register('noun_inflection_rules', lambda: compile_noun_inflections(resources.noun_inflections))
+
+
 def get_inflectional_rules(stem, rule):
     """
     Takes an inflectional rule, and returns an array of length three (or None) with the following information
         [Stem-Suffix, Suffix, Glosses]
 
+    If several stem-suffixes of the rule match, the longest one wins.
+
     :param stem: The stem of the word to get a rule for.
     :param rule: The rule as represented in a NorSource file.
     :return: An array with [Stem-Suffix, Suffix, Glosses]. The stem-suffix is
@@ -154,53 +403,50 @@ def get_inflectional_rules(stem, rule):
              find 'er' as the stem-suffix, and something like 'te' as suffix - i.e.
              the conjugated version.
     """
-    inflectional_rules = noun_inflections.get(rule, None)
-    if inflectional_rules is None:
+    compiled = resources.noun_inflection_rules.get(rule, None)
+    if compiled is None:
         return None
 
-    glosses = filter(
-        lambda x: x is not None,
-        map(
-            lambda x: GLOSS_CONVERSIONS.get(x),
-            inflectional_rules.get('attributes').values()
-        )
-    )
-
-    suffix_rules = inflectional_rules.get('suffix')
-    if suffix_rules is None:
-        return [None, None, glosses]
-
-    default = None
-    for key in suffix_rules:
-        if key == "*":
-            default = [key, suffix_rules[key], glosses]
-            continue
-        if re.search(key + '$', stem) is not None:
-            # We have found our proper matching end-case
-            return [key, suffix_rules[key], glosses]
+    glosses, suffixes, default = compiled
+    if suffixes is None:
+        return [None, None, list(glosses)]
 
-    return default
+    match = suffixes.longest_suffix(stem)
+    if match is not None:
+        # We have found our proper matching end-case
+        return [match[0], match[1], list(glosses)]
+
+    if default is not None:
+        return default + [list(glosses)]
+    return None
 
 
 def get_dominating_pos_rule(name, default=None):
-    return dominating_mappings['pos'].get(name, default)
+    return resources.dominating_mappings['pos'].get(name, default)
 
 
 def get_dominating_gloss_rule(name, default=None):
-    if name in dominating_mappings['pos']:
-        return dominating_mappings['pos'].get(name, default)
+    if name in resources.dominating_mappings['pos']:
+        return resources.dominating_mappings['pos'].get(name, default)
 
 
 def get_dominating_gloss_rule(name, default=None):
-    if name in dominating_mappings['gloss']:
-        return dominating_mappings['gloss'].get(name, default)
+    if name in resources.dominating_mappings['gloss']:
+        return resources.dominating_mappings['gloss'].get(name, default)
 
 
 def prune_common_concatenation_superfluity(value):
-    return concatenation_superfluity.get(value, value)
+    return resources.concatenation_superfluity.get(value, value)
 
 
 def chunks(l, n):
     """Yield successive n-sized chunks from l."""
     for i in range(0, len(l), n):
         yield l[i:i + n]
+
+
+def __getattr__(name):
+    # Keeps the resources available as module attributes, e.g. util.verb_lex, without loading them on import
+    if name in resources:
+        return getattr(resources, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,174 @@
+import os
+import xml.etree.ElementTree as ET
+
+from typecraft_python.parsing.parser import Parser as TParser
+
+
+class TextWriter(object):
+    """
+    Writes Typecraft Texts to a TC-XML file incrementally.
+
+    The output is opened once, and every Text is serialized and flushed as soon as it is written, so only a single
+    Text has to be held in memory at any time. Phrases may also be streamed into an open <text> element one at a
+    time, in which case not even a whole Text is held in memory. The resulting file is identical to what
+    typecraft_python.parsing.parser.Parser.write_to_file produces for the same list of texts.
+
+    When used as a context manager, the closing tags are only written if the block succeeds, so a failed conversion
+    never looks like a finished one. Output to a file path is written to a temporary file in the same directory,
+    which replaces the target only once the writer is closed. A failed conversion then leaves no output behind, and
+    an existing file at the target is left untouched.
+    """
+
+    def __init__(self, file_out):
+        """
+        Initializes the writer.
+
+        :param file_out: A file path, or a file object opened in binary mode
+        """
+        if hasattr(file_out, 'write'):
+            self._file = file_out
+            self._path = None
+        else:
+            directory, name = os.path.split(os.path.abspath(file_out))
+            self._path = file_out
+            self._temp_path = os.path.join(directory, '.%s.%d.tmp' % (name, os.getpid()))
+            self._file = open(self._temp_path, 'wb')
+
+        self._opened = False
+        self._closed = False
+        self._in_text = False
+
+    def open(self):
+        """
+        Writes the opening <typecraft> tag.
+        :return: void
+        """
+        if self._opened:
+            return
+
+        # Serialize an empty root, and turn the self-closing tag into an opening one
+        root = ET.tostring(TParser.convert_texts_to_etree([]), encoding='UTF-8')
+        self._file.write(root[:-len(b' />')] + b'>')
+        self._opened = True
+
+    def write_text(self, text):
+        """
+        Serializes a single Text and flushes it to the output.
+
+        :param text: A Typecraft Text
+        :return: void
+        """
+        self.open()
+
+        holder = ET.Element('typecraft')
+        TParser.convert_text_to_etree(holder, text)
+        self._file.write(ET.tostring(holder[0], encoding='UTF-8'))
+        self._file.flush()
+
+    def start_text(self, text):
+        """
+        Writes the opening <text> tag of a Text, along with its title, body and metadata. Its phrases are not
+        written, they are streamed with write_phrase instead.
+
+        :param text: A Typecraft Text
+        :return: void
+        """
+        self.open()
+        self.end_text()
+
+        holder = ET.Element('typecraft')
+        TParser.convert_text_to_etree(holder, text)
+        text_el = holder[0]
+        for phrase_el in text_el.findall('phrase'):
+            text_el.remove(phrase_el)
+
+        # The title, titleTranslation and body children keep the tag from self-closing
+        self._file.write(ET.tostring(text_el, encoding='UTF-8')[:-len(b'</text>')])
+        self._in_text = True
+
+    def write_phrase(self, phrase):
+        """
+        Serializes a single Phrase into the <text> element opened by start_text, and flushes it to the output.
+
+        :param phrase: A Typecraft Phrase
+        :return: void
+        """
+        holder = ET.Element('text')
+        TParser.convert_phrase_to_etree(holder, phrase)
+        self._file.write(ET.tostring(holder[0], encoding='UTF-8'))
+        self._file.flush()
+
+    def end_text(self):
+        """
+        Writes the closing </text> tag, if a text is open.
+        :return: void
+        """
+        if not self._in_text:
+            return
+
+        self._file.write(b'</text>')
+        self._file.flush()
+        self._in_text = False
+
+    def write_phrases(self, phrases, text, max_phrases_per_text=-1):
+        """
+        Streams phrases into the output, starting a new <text> every max_phrases_per_text phrases. The output is
+        the same as writing the Texts of Parser.group_texts, but only a single phrase is held in memory at a time.
+
+        :param phrases: An iterable of Typecraft Phrases
+        :param text: A Typecraft Text, whose title, language and metadata are used for every <text>
+        :param max_phrases_per_text: The number of phrases per <text>. -1 writes all phrases into a single <text>
+        :return: The number of phrases written
+        """
+        count = 0
+        for phrase in phrases:
+            if count == 0 or (max_phrases_per_text > 0 and count % max_phrases_per_text == 0):
+                self.start_text(text)
+            self.write_phrase(phrase)
+            count += 1
+
+        self.end_text()
+        return count
+
+    def close(self):
+        """
+        Writes the closing </typecraft> tag. If the writer was given a file path, the temporary file is closed and
+        moved onto it.
+        :return: void
+        """
+        if self._closed:
+            return
+
+        self.open()
+        self.end_text()
+        self._file.write(b'</typecraft>')
+        self._file.flush()
+        self._closed = True
+
+        if self._path is not None:
+            self._file.close()
+            os.replace(self._temp_path, self._path)
+
+    def abort(self):
+        """
+        Stops writing without the closing tags. If the writer was given a file path, the temporary file is removed,
+        and the target is left as it was.
+        :return: void
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        if self._path is not None:
+            self._file.close()
+            os.remove(self._temp_path)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
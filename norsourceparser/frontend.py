@@ -1,44 +1,442 @@
+import os
 import sys
+import time
 import click
 
+from norsourceparser.core.backends import XML_BACKENDS, XML_BACKEND_ETREE
 from norsourceparser.core.config import config
-from norsourceparser.core.parser import Parser, PosTreeParser
-from typecraft_python.parsing.parser import Parser as TParser
+from norsourceparser.core.files import COMPRESSED_SUFFIXES
+from norsourceparser.core.parser import Parser, PosTreeParser, iter_parse_records
+from norsourceparser.core.rules import branch_rule_cache, set_branch_cache_size
+from norsourceparser.core.util import get_lookup_cache_stats, set_lookup_cache_size, get_bundle_path, \
+    get_resources_version, resources, RESOURCES_DIR
 
+# Modules only a single command needs, like multiprocessing, the phrase cache with sqlite3, the snapshot format, the
+# bundle compiler and the writer with typecraft_python, are imported by that command. `--help` thus stays fast.
 
-def parse_standard(file_in, file_out):
-    tc_parse_result = Parser.parse_file(file_in)
-    TParser.write_to_file(file_out, tc_parse_result)
+
+def parse_standard(file_in, file_out, workers=1, cache=None):
+    from norsourceparser.core.writer import TextWriter
+
+    with TextWriter(file_out) as writer:
+        phrases = Parser.iter_phrases(file_in, workers=workers, cache=cache)
+        writer.write_phrases(phrases, Parser.create_text([]), config.MAX_PHRASES_PER_TEXT)
+
+
+def parse_snapshot(file_in, file_out):
+    from norsourceparser.core.writer import TextWriter
+
+    with TextWriter(file_out) as writer:
+        phrases = Parser.iter_snapshot_phrases(file_in)
+        writer.write_phrases(phrases, Parser.create_text([]), config.MAX_PHRASES_PER_TEXT)
 
 
 def parse_pos(file_in, file_out):
-    tc_parse_result = PosTreeParser.parse_file(file_in)
-    TParser.write_to_file(file_out, [tc_parse_result])
+    from norsourceparser.core.writer import TextWriter
+    from typecraft_python.models import Text
+
+    text = Text()
+    text.title = "Converted Norsource"
+    text.language = 'nob'
+    with TextWriter(file_out) as writer:
+        if writer.write_phrases(PosTreeParser.iter_phrases(file_in), text) == 0:
+            # The pos mode always writes a single text, even if it is empty
+            writer.write_text(text)
+
+
+def use_resources_bundle(path):
+    """
+    Makes the resources load from a compiled resource bundle other than the default one. Warns if the bundle can
+    not be used, in which case the JSON resources are loaded instead.
+
+    :param path: The path of the bundle, or None to keep the default
+    :return: void
+    """
+    if path is None:
+        return
+
+    config.RESOURCES_BUNDLE = path
+    if resources.bundle is None:
+        click.echo("Warning: The resource bundle %s is missing or stale, using the JSON resources" % path, err=True)
+
+
+def find_batch_files(input):
+    """
+    Finds the Norsource files to convert in batch mode.
 
+    :param input: A directory, in which case every (possibly compressed) .xml file in it is used, or a glob pattern
+    :return: A sorted list of file paths
+    """
+    import glob
+
+    if os.path.isdir(input):
+        patterns = [os.path.join(input, '*.xml' + suffix) for suffix in [''] + COMPRESSED_SUFFIXES]
+    else:
+        patterns = [input]
+
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(pattern))
+    return sorted(filter(os.path.isfile, files))
+
+
+def get_batch_output_name(file_in, output_dir):
+    """
+    Gets the output path of a file converted in batch mode. Compression suffixes are dropped, as the output is
+    always written uncompressed.
+
+    :param file_in:
+    :param output_dir:
+    :return: A file path
+    """
+    name = os.path.basename(file_in)
+    for suffix in COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return os.path.join(output_dir, name)
 
-@click.command()
+
+def find_batch_conflicts(files_in, output_dir):
+    """
+    Finds conversions which would clobber each other in batch mode: outputs which are also inputs, and inputs
+    sharing an output, like a.xml and a.xml.gz.
+
+    :param files_in: A list of input file paths
+    :param output_dir:
+    :return: A list of error messages, empty if there are no conflicts
+    """
+    inputs = set(os.path.realpath(file_in) for file_in in files_in)
+    outputs = {}
+    for file_in in files_in:
+        outputs.setdefault(os.path.realpath(get_batch_output_name(file_in, output_dir)), []).append(file_in)
+
+    errors = []
+    for file_out, sources in sorted(outputs.items()):
+        if file_out in inputs:
+            errors.append("%s would overwrite the input file %s" % (', '.join(sources), file_out))
+        elif len(sources) > 1:
+            errors.append("%s would all be written to %s" % (', '.join(sources), file_out))
+    return errors
+
+
+def is_up_to_date(file_in, file_out):
+    """
+    Checks whether an output file exists and is newer than its input file.
+
+    :param file_in:
+    :param file_out:
+    :return: True or False
+    """
+    return os.path.exists(file_out) and os.path.getmtime(file_out) >= os.path.getmtime(file_in)
+
+
+def convert_batch_file(job):
+    """
+    Worker entry point for batch mode. Converts a single file, and reports the outcome instead of raising, so one
+    broken file does not abort the rest of the batch. A failed conversion leaves no output behind, see TextWriter.
+
+    :param job: A tuple of (file_in, file_out, mode, debug, max_phrases_per_text, xml_backend, resources_bundle)
+    :return: A tuple of (file_in, file_out, seconds, error)
+    """
+    file_in, file_out, mode, debug, max_phrases_per_text, xml_backend, resources_bundle = job
+    config.DEBUG = debug
+    config.MAX_PHRASES_PER_TEXT = max_phrases_per_text
+    config.XML_BACKEND = xml_backend
+    config.RESOURCES_BUNDLE = resources_bundle
+
+    start = time.time()
+    try:
+        if mode == 'standard':
+            parse_standard(file_in, file_out)
+        elif mode == 'pos':
+            parse_pos(file_in, file_out)
+    except Exception as e:
+        return file_in, file_out, time.time() - start, e
+
+    return file_in, file_out, time.time() - start, None
+
+
+class DefaultCommandGroup(click.Group):
+    """
+    A click Group which falls back to the `convert` command when the first argument is not a known sub-command.
+    This keeps the original `norsourceparser <input> <output>` invocation working.
+    """
+
+    def parse_args(self, ctx, args):
+        if len(args) > 0 and args[0] not in self.commands and args[0] not in ctx.help_option_names:
+            args = ['convert'] + list(args)
+        return super(DefaultCommandGroup, self).parse_args(ctx, args)
+
+
+@click.group(cls=DefaultCommandGroup)
+def main():
+    """
+    Main entry point for the parser.
+    """
+    pass
+
+
+@main.command()
 @click.option('--debug/--no-debug', default=False, help='Enables debug mode. Will print errors')
 @click.option('--mode', default='standard', type=click.Choice(['standard', 'pos']))
 @click.option('--max-phrases-per-text', type=int, default=-1)
+@click.option('--xml-backend', default=XML_BACKEND_ETREE, type=click.Choice(XML_BACKENDS),
+              help='XML parser to read Norsource files with. lxml falls back to etree if it is not installed')
+@click.option('--workers', type=int, default=1, help='Number of processes to convert sentences with')
+@click.option('--branch-cache-size', type=int, default=config.BRANCH_CACHE_SIZE,
+              help='Number of branches to memoize rules for across sentences. 0 disables the cache')
+@click.option('--lookup-cache-size', type=int, default=config.LOOKUP_CACHE_SIZE,
+              help='Number of entries in each of the lookup caches for rule names and lexical entries. '
+                   '0 disables the caches')
+@click.option('--cache', 'cache_path', default=None, type=click.Path(dir_okay=False),
+              help='Reuses phrases converted in earlier runs, stored in this file')
+@click.option('--resources-bundle', default=None, envvar='NORSOURCEPARSER_RESOURCES_BUNDLE',
+              type=click.Path(dir_okay=False),
+              help='Compiled resource bundle to load, see compile-resources. Defaults to the one in the package')
 @click.argument('input', type=click.File('rb'))
-@click.argument('output', type=click.File('wb'))
-def main(
+@click.argument('output', type=click.Path(dir_okay=False, allow_dash=True))
+def convert(
     debug,
     mode,
     max_phrases_per_text,
+    xml_backend,
+    workers,
+    branch_cache_size,
+    lookup_cache_size,
+    cache_path,
+    resources_bundle,
     input,
     output
 ):
     """
-    Main entry point for the parser.
+    Converts a single Norsource file, or a snapshot written by the snapshot command.
 
     The entry point accepts 2-3 arguments, type, input and output respectively.
     :return: void
     """
+    from norsourceparser.core.snapshot import is_snapshot
+
     config.DEBUG = debug or False
     config.MAX_PHRASES_PER_TEXT = max_phrases_per_text
+    config.XML_BACKEND = xml_backend
+    set_branch_cache_size(branch_cache_size)
+    set_lookup_cache_size(lookup_cache_size)
+    use_resources_bundle(resources_bundle)
+    if output == '-':
+        output = click.get_binary_stream('stdout')
 
-    if mode == 'standard':
-        parse_standard(input, output)
+    if mode == 'standard' and is_snapshot(input):
+        if workers > 1 or cache_path is not None:
+            raise click.UsageError("--workers and --cache are not supported for snapshots")
+        parse_snapshot(input, output)
+    elif mode == 'standard':
+        if cache_path is None:
+            parse_standard(input, output, workers)
+        else:
+            from norsourceparser.core.cache import PhraseCache
+
+            with PhraseCache(cache_path) as cache:
+                parse_standard(input, output, workers, cache)
+            if debug:
+                click.echo("Cache: %d hits, %d misses" % (cache.hits, cache.misses), err=True)
     elif mode == 'pos':
         parse_pos(input, output)
+
+    if debug and workers <= 1:
+        click.echo("Branch cache: %(hits)d hits, %(misses)d misses, %(evictions)d evictions" %
+                   branch_rule_cache.stats(), err=True)
+        for name, stats in sorted(get_lookup_cache_stats().items()):
+            click.echo(("Lookup cache %s: " % name) + "%(hits)d hits, %(misses)d misses, %(evictions)d evictions" %
+                       stats, err=True)
+
+
+@main.command()
+@click.option('--debug/--no-debug', default=False, help='Enables debug mode. Will print errors')
+@click.option('--mode', default='standard', type=click.Choice(['standard', 'pos']))
+@click.option('--max-phrases-per-text', type=int, default=-1)
+@click.option('--xml-backend', default=XML_BACKEND_ETREE, type=click.Choice(XML_BACKENDS),
+              help='XML parser to read Norsource files with. lxml falls back to etree if it is not installed')
+@click.option('--workers', type=int, default=os.cpu_count() or 1, help='Number of files to convert at once')
+@click.option('--force/--no-force', default=False, help='Converts files even if their output is up to date')
+@click.option('--resources-bundle', default=None, envvar='NORSOURCEPARSER_RESOURCES_BUNDLE',
+              type=click.Path(dir_okay=False),
+              help='Compiled resource bundle to load, see compile-resources. Defaults to the one in the package')
+@click.argument('input')
+@click.argument('output_dir', type=click.Path(file_okay=False))
+def batch(
+    debug,
+    mode,
+    max_phrases_per_text,
+    xml_backend,
+    workers,
+    force,
+    resources_bundle,
+    input,
+    output_dir
+):
+    """
+    Converts every Norsource file in a directory, or matching a glob pattern, into OUTPUT_DIR.
+
+    Files are converted by a pool of worker processes, so the resources are only loaded once. Nothing is converted
+    if an output would overwrite an input, or if several inputs would be written to the same output.
+    :return: void
+    """
+    import multiprocessing
+
+    files_in = find_batch_files(input)
+    errors = find_batch_conflicts(files_in, output_dir)
+    if len(errors) > 0:
+        raise click.ClickException("Conflicting output files:\n" + "\n".join(errors))
+
+    use_resources_bundle(resources_bundle)
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    jobs = []
+    skipped = 0
+    for file_in in files_in:
+        file_out = get_batch_output_name(file_in, output_dir)
+        if not force and is_up_to_date(file_in, file_out):
+            click.echo("%s: up to date" % file_in)
+            skipped += 1
+            continue
+        jobs.append((file_in, file_out, mode, debug, max_phrases_per_text, xml_backend, resources_bundle))
+
+    failed = 0
+    if len(jobs) > 0:
+        pool = multiprocessing.Pool(max(1, min(workers, len(jobs))))
+        try:
+            for file_in, file_out, seconds, error in pool.imap_unordered(convert_batch_file, jobs):
+                if error is not None:
+                    click.echo("%s: FAILED (%s)" % (file_in, error), err=True)
+                    failed += 1
+                else:
+                    click.echo("%s -> %s (%.2fs)" % (file_in, file_out, seconds))
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    click.echo("Converted %d, skipped %d, failed %d" % (len(jobs) - failed, skipped, failed))
+    if failed > 0:
+        sys.exit(1)
+
+
+@main.command()
+@click.option('--debug/--no-debug', default=False, help='Enables debug mode. Will print errors')
+@click.option('--xml-backend', default=XML_BACKEND_ETREE, type=click.Choice(XML_BACKENDS),
+              help='XML parser to read Norsource files with. lxml falls back to etree if it is not installed')
+@click.argument('input', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output', type=click.Path(dir_okay=False))
+def snapshot(
+    debug,
+    xml_backend,
+    input,
+    output
+):
+    """
+    Writes the syntax trees of a Norsource file to a binary snapshot.
+
+    Converting the snapshot skips XML parsing, which pays off when re-running the rules on the same corpus.
+    :return: void
+    """
+    from norsourceparser.core.snapshot import write_snapshot
+
+    config.DEBUG = debug or False
+    config.XML_BACKEND = xml_backend
+
+    count = write_snapshot(iter_parse_records(input), output)
+    click.echo("Wrote %d records to %s" % (count, output))
+
+
+@main.command()
+@click.option('--debug/--no-debug', default=False, help='Enables debug mode. Will print errors')
+@click.option('--xml-backend', default=XML_BACKEND_ETREE, type=click.Choice(XML_BACKENDS),
+              help='XML parser to read Norsource files with. lxml falls back to etree if it is not installed')
+@click.option('--host', default='127.0.0.1')
+@click.option('--port', type=int, default=8765)
+@click.option('--socket', 'socket_path', default=None, help='Listens on this Unix socket instead of on host:port')
+@click.option('--resources-bundle', default=None, envvar='NORSOURCEPARSER_RESOURCES_BUNDLE',
+              type=click.Path(dir_okay=False),
+              help='Compiled resource bundle to load, see compile-resources. Defaults to the one in the package')
+def serve(
+    debug,
+    xml_backend,
+    host,
+    port,
+    socket_path,
+    resources_bundle
+):
+    """
+    Runs a conversion daemon with all resources loaded.
+
+    Jobs are accepted over HTTP, see norsourceparser.client for a matching thin client.
+    :return: void
+    """
+    from norsourceparser.server import create_server
+
+    config.DEBUG = debug or False
+    config.XML_BACKEND = xml_backend
+    use_resources_bundle(resources_bundle)
+
+    server = create_server(host=host, port=port, socket_path=socket_path)
+    click.echo("Listening on %s" % (socket_path or "%s:%d" % (host, port)))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@main.command()
+@click.option('--debug/--no-debug', default=False, help='Enables debug mode. Will print errors')
+@click.option('--xml-backend', default=XML_BACKEND_ETREE, type=click.Choice(XML_BACKENDS),
+              help='XML parser to read Norsource files with. lxml falls back to etree if it is not installed')
+@click.option('--resources-bundle', default=None, envvar='NORSOURCEPARSER_RESOURCES_BUNDLE',
+              type=click.Path(dir_okay=False),
+              help='Compiled resource bundle to load, see compile-resources. Defaults to the one in the package')
+@click.argument('input', type=click.Path(exists=True))
+@click.argument('output', type=click.Path())
+def export(
+    debug,
+    xml_backend,
+    resources_bundle,
+    input,
+    output
+):
+    """
+    Exports the words and morphemes of a Norsource file as integer-coded columns in an .npz archive.
+
+    Requires NumPy.
+    :return: void
+    """
+    from norsourceparser.core.columns import export_file
+
+    config.DEBUG = debug or False
+    config.XML_BACKEND = xml_backend
+    use_resources_bundle(resources_bundle)
+
+    result = export_file(input, output)
+    click.echo("Exported %d words from %d phrases" % (len(result), result.phrase_count))
+
+
+@main.command('compile-resources')
+@click.option('--output', default=None, envvar='NORSOURCEPARSER_RESOURCES_BUNDLE', type=click.Path(dir_okay=False),
+              help='Where to write the bundle. Defaults to the resources directory of the package. A bundle written '
+                   'elsewhere is loaded with --resources-bundle')
+def compile_resources(
+    output
+):
+    """
+    Compiles the JSON resources into a binary bundle, which is memory-mapped instead of parsing the JSON on startup.
+
+    The bundle is ignored once the JSON resources change, until it is compiled again.
+    :return: void
+    """
+    from norsourceparser.core.bundle import write_bundle
+
+    output = output or get_bundle_path()
+    write_bundle(output, RESOURCES_DIR, get_resources_version())
+    click.echo("Compiled resources %s into %s" % (get_resources_version(), output))
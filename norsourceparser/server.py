@@ -0,0 +1,145 @@
+"""
+A long-running conversion daemon.
+
+The daemon keeps typecraft_python and the resources loaded, and accepts conversion jobs over HTTP, either on a local
+TCP port or on a Unix socket. A job is a POST to /convert with the Norsource document as the body, and the response
+is the converted TC-XML. See norsourceparser.client for a matching client.
+"""
+import io
+import os
+import socket
+import traceback
+
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from norsourceparser.core.config import config
+from norsourceparser.core.util import resources
+from norsourceparser.frontend import parse_standard, parse_pos
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+MODES = ['standard', 'pos']
+
+
+def convert_document(document, mode='standard', max_phrases_per_text=-1):
+    """
+    Converts a Norsource document to TC-XML.
+
+    :param document: The Norsource document as bytes. Compressed documents are accepted as well
+    :param mode: Either 'standard' or 'pos'
+    :param max_phrases_per_text: See config.MAX_PHRASES_PER_TEXT
+    :return: The TC-XML document as bytes
+    """
+    if mode not in MODES:
+        raise ValueError("Unknown mode: %s" % mode)
+
+    file_in = io.BytesIO(document)
+    file_out = io.BytesIO()
+
+    previous_max_phrases_per_text = config.MAX_PHRASES_PER_TEXT
+    config.MAX_PHRASES_PER_TEXT = max_phrases_per_text
+    try:
+        if mode == 'standard':
+            parse_standard(file_in, file_out)
+        else:
+            parse_pos(file_in, file_out)
+    finally:
+        config.MAX_PHRASES_PER_TEXT = previous_max_phrases_per_text
+
+    return file_out.getvalue()
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles conversion jobs.
+
+        POST /convert?mode=standard&max_phrases_per_text=-1   Converts the request body
+        GET  /ping                                            Health check
+    """
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/ping':
+            self._respond(200, b'pong', 'text/plain')
+        else:
+            self._respond(404, b'Not found', 'text/plain')
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/convert':
+            self._respond(404, b'Not found', 'text/plain')
+            return
+
+        query = parse_qs(url.query)
+        try:
+            mode = query.get('mode', ['standard'])[0]
+            max_phrases_per_text = int(query.get('max_phrases_per_text', [-1])[0])
+            length = int(self.headers.get('Content-Length', 0))
+            document = self.rfile.read(length)
+        except ValueError as e:
+            self._respond(400, str(e).encode('utf-8'), 'text/plain')
+            return
+
+        try:
+            result = convert_document(document, mode, max_phrases_per_text)
+        except Exception as e:
+            if config.DEBUG:
+                traceback.print_exc()
+            self._respond(400, ("Conversion failed: %s" % e).encode('utf-8'), 'text/plain')
+            return
+
+        self._respond(200, result, 'application/xml')
+
+    def address_string(self):
+        # Unix sockets have no client address
+        if isinstance(self.client_address, tuple) and len(self.client_address) > 0:
+            return str(self.client_address[0])
+        return 'unix'
+
+    def log_message(self, format, *args):
+        if config.DEBUG:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _respond(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class UnixHTTPServer(HTTPServer):
+    """
+    An HTTPServer listening on a Unix socket.
+    """
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        HTTPServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+    def server_close(self):
+        HTTPServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    """
+    Creates a conversion server. Jobs are handled one at a time, as they share the global config.
+
+    :param host: The host to listen on
+    :param port: The port to listen on
+    :param socket_path: If given, we listen on this Unix socket instead of on host:port
+    :return: An HTTPServer
+    """
+    # Resources are loaded lazily, so we load them here rather than in the first job
+    resources.load_all()
+
+    if socket_path is not None:
+        return UnixHTTPServer(socket_path, ConversionRequestHandler)
+    return HTTPServer((host, port), ConversionRequestHandler)
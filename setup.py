@@ -30,11 +30,17 @@ setup(
                  'norsourceparser'},
     entry_points={
         'console_scripts': [
-            'norsourceparser=norsourceparser.frontend:main'
+            'norsourceparser=norsourceparser.frontend:main',
+            'norsourceparser-client=norsourceparser.client:main'
         ]
     },
     include_package_data=True,
+    python_requires='>=3.7',
     install_requires=requirements,
+    extras_require={
+        'lxml': ['lxml'],
+        'numpy': ['numpy'],
+    },
     license="MIT license",
     zip_safe=False,
     keywords='norsourceparser',
@@ -43,12 +49,13 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
         'Natural Language :: English',
-        "Programming Language :: Python :: 2",
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
     test_suite='tests',
     tests_require=test_requirements
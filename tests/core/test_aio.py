@@ -0,0 +1,30 @@
+from concurrent.futures import ProcessPoolExecutor
+from norsourceparser.core.aio import AsyncParser
+from norsourceparser.core.parser import Parser
+from typecraft_python.parsing.parser import Parser as TParser
+import asyncio
+import os
+
+pos_file_name = os.path.join(os.path.dirname(__file__), '../resources/norsource_pos.xml')
+
+
+def test_aiter_phrases():
+    async def collect():
+        return [phrase async for phrase in AsyncParser.aiter_phrases(pos_file_name, prefetch=2)]
+
+    phrases = asyncio.run(collect())
+    assert [phrase.phrase for phrase in phrases] == [phrase.phrase for phrase in Parser.parse_file(pos_file_name)[0]]
+
+
+def test_aparse_file_with_process_pool():
+    with ProcessPoolExecutor(2) as executor:
+        texts = asyncio.run(AsyncParser.aparse_file(pos_file_name, executor=executor))
+
+    assert TParser.write(texts) == TParser.write(Parser.parse_file(pos_file_name))
+
+
+def test_aparse():
+    with open(pos_file_name, 'rb') as fp:
+        texts = asyncio.run(AsyncParser.aparse(fp.read()))
+
+    assert TParser.write(texts) == TParser.write(Parser.parse_file(pos_file_name))
@@ -0,0 +1,38 @@
+from norsourceparser.core.backends import get_backend, ElementTreeBackend, XML_BACKENDS
+from norsourceparser.core.parser import iter_parse_records
+import os
+import pytest
+
+resources = os.path.join(os.path.dirname(__file__), '../resources')
+file_names = [os.path.join(resources, name) for name in sorted(os.listdir(resources))]
+
+
+def _summarize(record):
+    nodes = None
+    if record.syntax_tree is not None:
+        nodes = [(node.id, node.name, node.parent_id, node.is_terminal) for node in record.syntax_tree]
+    return record.input, record.pos_tree, nodes
+
+
+@pytest.mark.parametrize('file_name', file_names)
+def test_backends_agree(file_name):
+    expected = [_summarize(record) for record in iter_parse_records(file_name, 'etree')]
+    assert len(expected) > 0
+
+    for backend in XML_BACKENDS:
+        assert [_summarize(record) for record in iter_parse_records(file_name, backend)] == expected
+
+
+@pytest.mark.parametrize('file_name', file_names)
+def test_backends_skip_syntax_trees(file_name):
+    expected = [_summarize(record)[:2] + (None,) for record in iter_parse_records(file_name, 'etree')]
+
+    for backend in XML_BACKENDS:
+        records = iter_parse_records(file_name, backend, syntax_tree=False)
+        assert [_summarize(record) for record in records] == expected
+
+
+def test_get_backend():
+    assert isinstance(get_backend('etree'), ElementTreeBackend)
+    with pytest.raises(ValueError):
+        get_backend('unknown')
@@ -0,0 +1,50 @@
+import os
+import json
+
+from norsourceparser.core.bundle import write_bundle, open_bundle, BUNDLED_RESOURCES
+from norsourceparser.core.util import RESOURCES_DIR, get_resources_version
+
+
+def test_bundle_roundtrip(tmpdir):
+    path = str(tmpdir.join('resources.bundle'))
+    write_bundle(path, RESOURCES_DIR, get_resources_version())
+
+    bundle = open_bundle(path, RESOURCES_DIR, get_resources_version)
+    assert bundle is not None
+    assert bundle.content_hash == get_resources_version()
+
+    for name in BUNDLED_RESOURCES:
+        with open(os.path.join(RESOURCES_DIR, '%s.json' % name), 'r') as fp:
+            expected = json.load(fp)
+        table = bundle.get_table(name)
+        assert len(table) == len(expected)
+        assert dict(table.items()) == expected
+
+    gloss = bundle.get_table('gloss')
+    key = next(iter(gloss))
+    assert key in gloss
+    assert gloss[key] is gloss.get(key)
+    assert gloss.get('no_such_key') is None
+    assert 'no_such_key' not in gloss
+    assert bundle.get_table('meanings') is None
+
+
+def test_bundle_missing_or_stale(tmpdir):
+    path = str(tmpdir.join('resources.bundle'))
+    assert open_bundle(path, RESOURCES_DIR, get_resources_version) is None
+
+    resources_dir = str(tmpdir.mkdir('resources'))
+    with open(os.path.join(resources_dir, 'gloss.json'), 'w') as fp:
+        json.dump({'a_n': 'A'}, fp)
+    write_bundle(path, resources_dir, 'original', names=['gloss'])
+    assert open_bundle(path, resources_dir, lambda: 'original') is not None
+
+    # The sources changed, so the content hash decides
+    with open(os.path.join(resources_dir, 'gloss.json'), 'w') as fp:
+        json.dump({'a_n': 'B', 'b_n': 'B'}, fp)
+    assert open_bundle(path, resources_dir, lambda: 'original') is not None
+    assert open_bundle(path, resources_dir, lambda: 'changed') is None
+
+    with open(path, 'wb') as fp:
+        fp.write(b'not a bundle')
+    assert open_bundle(path, resources_dir, lambda: 'original') is None
@@ -0,0 +1,45 @@
+from norsourceparser.core.backends import ParseRecord
+from norsourceparser.core import cache as cache_module
+from norsourceparser.core.cache import PhraseCache, get_record_key, get_converter_version
+from norsourceparser.core.models import UnresolvedSyntaxTree, SyntaxNode
+from norsourceparser.core.parser import Parser
+from typecraft_python.parsing.parser import Parser as TParser
+import os
+
+pos_file_name = os.path.join(os.path.dirname(__file__), '../resources/norsource_pos.xml')
+
+
+def _record(name):
+    tree = UnresolvedSyntaxTree(top="n1")
+    tree.add_node(SyntaxNode(id="n1", name=name))
+    return ParseRecord(input="Kebab", syntax_tree=tree)
+
+
+def test_record_key():
+    assert get_record_key(_record("kebab_n_neut")) == get_record_key(_record("kebab_n_neut"))
+    assert get_record_key(_record("kebab_n_neut")) != get_record_key(_record("kebab_n_masc"))
+
+
+def test_record_key_covers_converter_sources(monkeypatch):
+    key = get_record_key(_record("kebab_n_neut"))
+    assert len(get_converter_version()) == 40
+
+    # As if rules.py had been edited
+    monkeypatch.setattr(cache_module, '_converter_version', 'edited')
+    assert get_record_key(_record("kebab_n_neut")) != key
+
+
+def test_parse_file_with_cache(tmpdir):
+    cache_path = str(tmpdir.join('cache.db'))
+    expected = TParser.write(Parser.parse_file(pos_file_name))
+
+    with PhraseCache(cache_path) as cache:
+        assert TParser.write(Parser.parse_file(pos_file_name, cache=cache)) == expected
+        assert cache.misses == 3
+        assert len(cache) == 3
+
+    with PhraseCache(cache_path) as cache:
+        assert TParser.write(Parser.parse_file(pos_file_name, cache=cache)) == expected
+        assert TParser.write(Parser.parse_file(pos_file_name, workers=2, cache=cache)) == expected
+        assert cache.hits == 6
+        assert cache.misses == 0
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from norsourceparser.core.columns import ColumnarExport, export_file, load_columns
+from norsourceparser.core.parser import Parser
+
+numpy = pytest.importorskip('numpy')
+
+file_name = os.path.join(os.path.dirname(__file__), '../resources/norsource_2.xml')
+
+
+def test_columnar_export_matches_phrases():
+    export = ColumnarExport()
+    export.add_views(Parser.iter_phrase_views(file_name))
+
+    words = [word for phrase in Parser.iter_phrases(file_name) for word in phrase.words]
+    forms = export.get_vocabulary('forms')
+    pos = export.get_vocabulary('pos')
+
+    assert len(export) == len(words)
+    assert [forms[code] for code in export.columns['word_form']] == [word.word for word in words]
+    assert [pos[code] for code in export.columns['word_pos']] == [word.pos or "" for word in words]
+    assert sum(export.columns['word_morpheme_count']) == len(export.columns['morpheme_word'])
+
+
+def test_export_file(tmpdir):
+    path = str(tmpdir.join('columns.npz'))
+    export = export_file(file_name, path, batch_size=1)
+
+    columns = load_columns(path)
+    assert len(columns['word_phrase']) == len(export)
+    glosses = columns['glosses'][columns['morpheme_gloss']]
+    assert 'DEF.MASC.SG' in glosses
+    assert numpy.all(numpy.diff(columns['word_morpheme_start']) == columns['word_morpheme_count'][:-1])
@@ -0,0 +1,38 @@
+from norsourceparser.core.files import open_norsource
+from norsourceparser.core.parser import Parser, PosTreeParser
+from typecraft_python.parsing.parser import Parser as TParser
+import bz2
+import gzip
+import os
+import shutil
+
+pos_file_name = os.path.join(os.path.dirname(__file__), '../resources/norsource_pos.xml')
+
+
+def _compress(tmpdir, opener, suffix):
+    compressed_file_name = str(tmpdir.join('norsource_pos.xml' + suffix))
+    with open(pos_file_name, 'rb') as fp_in:
+        with opener(compressed_file_name, 'wb') as fp_out:
+            shutil.copyfileobj(fp_in, fp_out)
+    return compressed_file_name
+
+
+def test_open_plain_file():
+    with open(pos_file_name, 'rb') as fp:
+        content = fp.read()
+
+    with open_norsource(pos_file_name) as fp:
+        assert fp.read() == content
+
+
+def test_parse_compressed_file(tmpdir):
+    expected = TParser.write(Parser.parse_file(pos_file_name))
+
+    for opener, suffix in [(gzip.open, '.gz'), (bz2.BZ2File, '.bz2')]:
+        compressed_file_name = _compress(tmpdir, opener, suffix)
+
+        assert TParser.write(Parser.parse_file(compressed_file_name)) == expected
+        assert len(list(Parser.iter_phrases(compressed_file_name))) == 3
+        assert len(PosTreeParser.parse_file(compressed_file_name).phrases) == 3
+        with open(compressed_file_name, 'rb') as fp:
+            assert TParser.write(Parser.parse_file(fp)) == expected
@@ -0,0 +1,32 @@
+from norsourceparser.core.constants import REDUCED_RULE_GLOSSES, REDUCED_RULE_PRIORITY_MERGE
+from norsourceparser.core.glosses import merge_glosses, parse_gloss, render_gloss
+from norsourceparser.core.models import ReducedNode
+from norsourceparser.core.rules import Rule
+
+
+def test_merge_glosses_removes_duplicates_and_sorts():
+    merged = merge_glosses("SG.DEF", "DEF.NEUT")
+
+    assert render_gloss(merged) == "DEF.NEUT.SG"
+    assert render_gloss(merge_glosses(merged, "PL")) == "DEF.NEUT.PL.SG"
+
+
+def test_merge_glosses_keeps_empty_features():
+    assert render_gloss(merge_glosses("", "PL")) == ".PL"
+
+
+def test_merge_glosses_prunes_superfluous_concatenations():
+    assert render_gloss(merge_glosses("PASS.PTCP", "PRF")) == "PASS.PTCP"
+
+
+def test_unmerged_gloss_is_rendered_as_is():
+    assert render_gloss("SG.DEF") == "SG.DEF"
+    assert render_gloss(parse_gloss("SG.DEF")) == "SG.DEF"
+
+
+def test_reduced_node_merges_gloss_rules():
+    node = ReducedNode("hunden")
+    node.add_rule(Rule(REDUCED_RULE_GLOSSES, ["", "SG"], REDUCED_RULE_PRIORITY_MERGE))
+    node.add_rule(Rule(REDUCED_RULE_GLOSSES, ["", "DEF.SG"], REDUCED_RULE_PRIORITY_MERGE))
+
+    assert [render_gloss(gloss) for gloss in node.get(REDUCED_RULE_GLOSSES)] == ["", "DEF.SG"]
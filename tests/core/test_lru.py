@@ -0,0 +1,25 @@
+from norsourceparser.core.lru import LRUCache
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'evictions': 1, 'size': 2, 'maxsize': 2}
+
+    cache.resize(1)
+    assert len(cache) == 1
+    assert 'c' in cache
+
+
+def test_lru_cache_disabled():
+    cache = LRUCache(0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+    assert len(cache) == 0
@@ -0,0 +1,27 @@
+from norsourceparser.core.backends import create_syntax_node
+from norsourceparser.core.names import NameTable
+
+
+def test_name_table():
+    table = NameTable()
+    name_id = table.intern("pres-infl_rule")
+
+    assert table.intern("".join(["pres-", "infl_rule"])) == name_id
+    assert table.get_name(name_id) == "pres-infl_rule"
+    assert table.intern("pret-nonfstr_infl_rule") != name_id
+    assert len(table) == 2
+
+
+def test_node_names_are_interned():
+    node_1 = create_syntax_node('node', {'id': 'n1', 'name': "".join(["pres-", "infl_rule"])})
+    node_2 = create_syntax_node('node', {'id': 'n2', 'name': "".join(["pres-infl", "_rule"])})
+
+    assert node_1.name is node_2.name
+
+
+def test_terminal_names_are_not_interned():
+    import sys
+
+    node = create_syntax_node('terminal', {'id': 'n3', 'name': "".join(["digg", "er"])})
+    assert node.name == "digger"
+    assert sys.intern("".join(["dig", "ger"])) is not node.name
@@ -29,3 +29,66 @@ def test_parse_pos_tree_file():
     result = PosTreeParser.parse_file(pos_file_name)
 
     assert isinstance(result, Text)
+
+
+def test_iter_phrases():
+    phrases = list(Parser.iter_phrases(pos_file_name))
+    text = Parser.parse_file(pos_file_name)[0]
+
+    assert len(phrases) == 3
+    assert [phrase.phrase for phrase in phrases] == [phrase.phrase for phrase in text.phrases]
+
+
+def test_pos_tree_iter_phrases():
+    phrases = list(PosTreeParser.iter_phrases(pos_file_name))
+    text = PosTreeParser.parse_file(pos_file_name)
+
+    assert len(phrases) == 3
+    assert [phrase.phrase for phrase in phrases] == [phrase.phrase for phrase in text.phrases]
+    assert [word.word for word in phrases[0].words] == [word.word for word in text.phrases[0].words]
+
+
+def test_parse_file_workers():
+    sequential = Parser.parse_file(pos_file_name)
+    parallel = Parser.parse_file(pos_file_name, workers=2)
+
+    assert TParser.write(parallel) == TParser.write(sequential)
+
+
+def test_parse_file_spawned_workers_get_config(monkeypatch):
+    import multiprocessing
+    from norsourceparser.core.config import config
+    from norsourceparser.core.parser import _init_worker
+    from norsourceparser.core.rules import branch_rule_cache, set_branch_cache_size
+
+    # Spawned workers start from a fresh interpreter, as on macOS and Windows
+    monkeypatch.setattr(multiprocessing, 'Pool', multiprocessing.get_context('spawn').Pool)
+    sequential = Parser.parse_file(pos_file_name)
+    assert TParser.write(Parser.parse_file(pos_file_name, workers=2)) == TParser.write(sequential)
+
+    settings = config.snapshot()
+    try:
+        _init_worker(dict(settings, BRANCH_CACHE_SIZE=7, RESOURCES_BUNDLE='resources.bundle'))
+        assert config.RESOURCES_BUNDLE == 'resources.bundle'
+        assert branch_rule_cache.maxsize == 7
+    finally:
+        config.update(settings)
+        set_branch_cache_size(config.BRANCH_CACHE_SIZE)
+
+
+def test_parse():
+    with open(pos_file_name, 'rb') as fp:
+        texts = Parser.parse(fp.read())
+
+    assert TParser.write(texts) == TParser.write(Parser.parse_file(pos_file_name))
+
+
+def test_iter_phrase_views():
+    views = list(Parser.iter_phrase_views(file_name))
+    phrases = list(Parser.iter_phrases(file_name))
+
+    assert len(views) == len(phrases)
+    for view, phrase in zip(views, phrases):
+        assert view.phrase == phrase.phrase
+        assert view.comment == phrase.comment
+        assert [(word.word, word.pos) for word in view] == [(word.word, word.pos) for word in phrase.words]
@@ -13,4 +13,8 @@ def test_pos_tree_resolve():
     assert resolved[1][1] == 'Running'
 
 
+def test_pos_tree_resolve_keeps_punctuation_and_hyphenated_words():
+    tree = '("S" ("S" ("PN" ("Dette")) ("VP" ("V" ("V" ("var"))) ("N" ("N" ("sms-en")))))) ("PUNCT" (".")))'
 
+    resolved = PosTreeContainer.resolve_pos_tree(tree)
+    assert resolved == [('PN', 'Dette'), ('V', 'var'), ('N', 'sms-en'), ('PUNCT', '.')]
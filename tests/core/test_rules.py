@@ -1,8 +1,11 @@
 # coding=utf-8
 from __future__ import unicode_literals
-from norsourceparser.core.constants import REDUCED_RULE_POS, REDUCED_RULE_MORPHOLOGICAL_BREAKUP, REDUCED_RULE_GLOSSES
+from norsourceparser.core.constants import REDUCED_RULE_POS, REDUCED_RULE_MORPHOLOGICAL_BREAKUP, REDUCED_RULE_GLOSSES, \
+    REDUCED_RULE_CITATION_FORM, REDUCED_RULE_PRIORITY_AMBIGUOUS, REDUCED_RULE_PRIORITY_MERGE
 from norsourceparser.core.models import SyntaxNode
-from norsourceparser.core.rules import parse_lexical_entry
+from norsourceparser.core.util import set_lookup_cache_size, get_lookup_cache_stats
+from norsourceparser.core.rules import parse_lexical_entry, analyse_lexical_entry, get_rules_from_partial_branch, \
+    BranchNode, lexical_analysis_cache, get_name_features, name_features_cache
 
 
 def test_parse_lexical_entry_with_typical_input():
@@ -27,3 +30,68 @@ def test_parse_lexical_entry_non_NVADJ_returns_breakup():
     rules = parse_lexical_entry(SyntaxNode(name='Fortere'), 'Fortere', 'ADV', None)
 
     assert len(rules) == 2
+
+
+def test_analyse_lexical_entry():
+    lexical = analyse_lexical_entry([BranchNode('hunden'), BranchNode('hund_n_dog')])
+
+    assert lexical.stem == 'hund'
+    assert lexical.pos == 'N'
+    assert lexical.is_inflected
+
+    lexical = analyse_lexical_entry([BranchNode('hund'), BranchNode('hund_n_dog')])
+    assert not lexical.is_inflected
+
+
+def test_analyse_lexical_entry_is_memoized():
+    branch = [BranchNode('hunden'), BranchNode('hund_n_dog')]
+
+    assert analyse_lexical_entry(branch) is analyse_lexical_entry(list(branch))
+
+
+def test_analyse_lexical_entry_is_a_lookup_cache():
+    size = lexical_analysis_cache.maxsize
+    try:
+        set_lookup_cache_size(2)
+        for name in ['hunden', 'hundene', 'hund']:
+            analyse_lexical_entry([BranchNode(name), BranchNode('hund_n_dog')])
+        assert len(lexical_analysis_cache) == 2
+        assert 'analyse_lexical_entry' in get_lookup_cache_stats()
+    finally:
+        set_lookup_cache_size(size)
+
+
+def test_get_rules_from_partial_branch_of_lexical_entry():
+    branch = [BranchNode('gaver'), BranchNode('gave_n_mascorfem')]
+
+    rules = get_rules_from_partial_branch(branch)
+
+    assert [(rule.rule_id, rule.value, rule.priority) for rule in rules] == [
+        (REDUCED_RULE_POS, 'N', REDUCED_RULE_PRIORITY_AMBIGUOUS),
+        (REDUCED_RULE_CITATION_FORM, 'gave', REDUCED_RULE_PRIORITY_AMBIGUOUS),
+        (REDUCED_RULE_MORPHOLOGICAL_BREAKUP, ['gave', 'r'], REDUCED_RULE_PRIORITY_AMBIGUOUS),
+        (REDUCED_RULE_GLOSSES, ['', 'MASC'], REDUCED_RULE_PRIORITY_MERGE),
+    ]
+
+
+def test_get_name_features():
+    features = get_name_features('adv-from-adj-pos-lrule')
+    assert features.dominating_pos == 'ADV'
+    assert features.dominating_gloss == 'ADJ>ADV'
+    assert get_name_features('adv-from-adj-pos-lrule') is features
+
+    features = get_name_features('head-subject-rule')
+    assert features.dominating_pos is None
+    assert features.dominating_gloss is None
+
+
+def test_name_features_are_bounded_by_the_lookup_cache_size():
+    size = name_features_cache.maxsize
+    try:
+        set_lookup_cache_size(2)
+        for name in ['a_n', 'b_n', 'c_n']:
+            get_name_features(name)
+        assert len(name_features_cache) == 2
+        assert 'get_name_features' in get_lookup_cache_stats()
+    finally:
+        set_lookup_cache_size(size)
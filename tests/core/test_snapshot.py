@@ -0,0 +1,58 @@
+import os
+
+from norsourceparser.core.backends import ParseRecord
+from norsourceparser.core.parser import Parser, iter_parse_records
+from norsourceparser.core.snapshot import SnapshotReader, write_snapshot, is_snapshot
+from typecraft_python.parsing.parser import Parser as TParser
+
+file_name = os.path.join(os.path.dirname(__file__), '../resources/norsource_2.xml')
+
+
+def test_snapshot_roundtrip(tmpdir):
+    path = str(tmpdir.join('norsource.snap'))
+    records = list(iter_parse_records(file_name))
+    records.append(ParseRecord(input="Uten tre"))
+
+    assert write_snapshot(records, path) == len(records)
+    assert is_snapshot(path)
+    assert not is_snapshot(file_name)
+
+    with SnapshotReader(path) as snapshot:
+        assert len(snapshot) == len(records)
+        for record, loaded in zip(records, snapshot):
+            assert loaded.input == record.input
+            assert loaded.pos_tree == record.pos_tree
+            if record.syntax_tree is None:
+                assert loaded.syntax_tree is None
+            else:
+                assert len(loaded.syntax_tree) == len(list(record.syntax_tree))
+                assert loaded.syntax_tree.top == record.syntax_tree.top
+
+
+def test_snapshot_phrases_match_xml(tmpdir):
+    path = str(tmpdir.join('norsource.snap'))
+    write_snapshot(iter_parse_records(file_name), path)
+
+    from_xml = TParser.write(list(Parser.iter_texts(file_name)))
+    from_snapshot = TParser.write(list(Parser.group_texts(Parser.iter_snapshot_phrases(path))))
+
+    assert from_xml == from_snapshot
+
+
+def test_snapshot_only_interns_node_names(tmpdir):
+    import sys
+
+    path = str(tmpdir.join('norsource.snap'))
+    write_snapshot(list(iter_parse_records(file_name)) + [ParseRecord(input="Uten tre")], path)
+
+    with SnapshotReader(path) as snapshot:
+        tree = snapshot[0].syntax_tree
+        for index in range(len(tree)):
+            name = tree.get_name(index)
+            if tree.terminals[index] and len(name) > 1:
+                assert sys.intern("".join(list(name))) is not name
+            elif not tree.terminals[index]:
+                assert sys.intern("".join(list(name))) is name
+
+        sentence = snapshot[len(snapshot) - 1].input
+        assert sys.intern("".join(list(sentence))) is not sentence
@@ -139,3 +139,60 @@ def test_reduce_and_convert():
     assert word.pos == "N"
 
 
+def test_find_node_by_id():
+    node_1 = SyntaxNode(id="n1", name="head-subject-rule")
+    node_2 = SyntaxNode(id="n2", name="digg_n_masc", parent_id="n1")
+    node_3 = SyntaxNode(id="n2", name="digger", parent_id="n2", is_terminal=True)
+
+    tree = SyntaxTree()
+    tree.add_node(node_1)
+    tree.add_node(node_2)
+    tree.add_node(node_3)
+
+    assert tree.find_node_by_id("n1") is node_1
+    assert tree.find_node_by_id("n2") is node_2
+    assert tree.find_node_by_id("n3") is None
+    assert tree.find_node_by_id(None) is None
+
+    tree.remove_node(node_2)
+    assert tree.find_node_by_id("n2") is node_3
+
+    tree.remove_node(node_1)
+    assert tree.find_node_by_id("n1") is None
+
+
+def test_reduce_with_branch_cache():
+    from norsourceparser.core.rules import branch_rule_cache
+
+    def create_tree():
+        u_tree = UnresolvedSyntaxTree()
+        u_tree.add_node(SyntaxNode(id="n1", name="head-subject-rule"))
+        u_tree.add_node(SyntaxNode(id="n2", name="digg_n_masc", parent_id="n1"))
+        u_tree.add_node(SyntaxNode(id="n3", name="digger", parent_id="n2", is_terminal=True))
+        return u_tree
+
+    branch_rule_cache.clear()
+    first = create_tree().resolve().reduce().convert_to_tc()
+    second = create_tree().resolve().reduce().convert_to_tc()
+
+    assert branch_rule_cache.hits == 2
+    assert [(word.word, word.pos) for word in first.words] == [(word.word, word.pos) for word in second.words]
+
+
+def test_compact_syntax_tree():
+    from norsourceparser.core.models import CompactSyntaxTree
+
+    u_tree = UnresolvedSyntaxTree()
+    u_tree.add_node(SyntaxNode(id="n1", name="head-subject-rule"))
+    u_tree.add_node(SyntaxNode(id="n2", name="digg_n_masc", parent_id="n1"))
+    u_tree.add_node(SyntaxNode(id="n3", name="digger", parent_id="n2", is_terminal=True))
+
+    compact = CompactSyntaxTree.from_syntax_tree(u_tree)
+    assert len(compact) == 3
+    assert list(compact.parents) == [-1, 0, 1]
+    assert compact.get_terminal_indices() == [2]
+    assert compact.get_name(2) == "digger"
+
+    converted = compact.reduce().convert_to_tc()
+    expected = u_tree.resolve().reduce().convert_to_tc()
+    assert [(word.word, word.pos) for word in converted.words] == [(word.word, word.pos) for word in expected.words]
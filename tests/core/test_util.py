@@ -0,0 +1,74 @@
+# coding=utf-8
+from __future__ import unicode_literals
+from norsourceparser.core.util import SuffixTrie, get_inflectional_rules, get_gloss, get_pos, get_valency, \
+    lookup_caches, get_lookup_cache_stats
+
+
+def test_suffix_trie_longest_match():
+    trie = SuffixTrie({'er': 'ere', 'finger': 'fingre', 'el': 'ler'})
+
+    assert trie.longest_suffix('finger') == ('finger', 'fingre')
+    assert trie.longest_suffix('lærer') == ('er', 'ere')
+    assert trie.longest_suffix('bok') is None
+
+
+def test_get_inflectional_rules_prefers_longest_suffix():
+    rule = get_inflectional_rules('finger', 'pl_ind_m-or-f_final-full_irule')
+
+    assert rule[0] == 'finger'
+    assert rule[1] == 'fingre'
+    assert sorted(rule[2]) == ['INDEF', 'MASC', 'PL']
+
+
+def test_get_inflectional_rules_default():
+    rule = get_inflectional_rules('hest', 'pl_ind_m-or-f_final-full_irule')
+
+    assert rule[:2] == ['*', 'er']
+
+
+def test_get_inflectional_rules_unknown_rule():
+    assert get_inflectional_rules('hest', 'unknown_irule') is None
+
+
+def test_lookups_are_memoized_including_misses():
+    cache = lookup_caches['get_pos']
+    cache.clear()
+
+    assert get_pos('n') == 'N'
+    assert get_pos('n') == 'N'
+    assert get_pos('no-such_rule_at-all') is None
+    assert get_pos('no-such_rule_at-all', 'X') == 'X'
+
+    stats = get_lookup_cache_stats()['get_pos']
+    assert stats['misses'] == 2
+    assert stats['hits'] == 2
+    assert stats['size'] == 2
+
+
+def test_memoized_lookups_respect_default():
+    assert get_gloss('no-such_rule_at-all', '') == ''
+    assert get_gloss('no-such_rule_at-all') is None
+    assert get_valency('no-such_rule_at-all', 'X') == ('X', None)
+    assert get_valency(None) == (None, None)
+
+
+def test_resource_registry_loads_on_first_access():
+    from norsourceparser.core.util import ResourceRegistry
+
+    loads = []
+    registry = ResourceRegistry()
+    registry.register('table', lambda: loads.append(1) or {'a': 1})
+
+    assert 'table' in registry
+    assert not registry.is_loaded('table')
+    assert registry.table == {'a': 1}
+    assert registry.table == {'a': 1}
+    assert registry.is_loaded('table')
+    assert loads == [1]
+
+
+def test_resources_are_module_attributes():
+    from norsourceparser.core import util
+
+    assert len(util.pos) > 0
+    assert util.verb_lex is util.resources.verb_lex
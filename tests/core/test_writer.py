@@ -0,0 +1,87 @@
+from norsourceparser.core.config import config
+from norsourceparser.core.parser import Parser
+from norsourceparser.core.writer import TextWriter
+from typecraft_python.parsing.parser import Parser as TParser
+import io
+import os
+
+pos_file_name = os.path.join(os.path.dirname(__file__), '../resources/norsource_pos.xml')
+
+
+def test_iter_texts():
+    config.MAX_PHRASES_PER_TEXT = 2
+    try:
+        texts = list(Parser.iter_texts(pos_file_name))
+    finally:
+        config.MAX_PHRASES_PER_TEXT = -1
+
+    assert len(texts) == 2
+    assert len(texts[0].phrases) == 2
+    assert len(texts[1].phrases) == 1
+
+
+def test_text_writer_matches_write():
+    texts = Parser.parse_file(pos_file_name)
+    output = io.BytesIO()
+    with TextWriter(output) as writer:
+        for text in texts:
+            writer.write_text(text)
+
+    assert output.getvalue() == TParser.write(texts)
+
+
+def test_text_writer_write_phrases_matches_write():
+    phrases = list(Parser.iter_phrases(pos_file_name))
+
+    for max_phrases_per_text in [-1, 2]:
+        config.MAX_PHRASES_PER_TEXT = max_phrases_per_text
+        try:
+            texts = list(Parser.group_texts(phrases))
+        finally:
+            config.MAX_PHRASES_PER_TEXT = -1
+
+        output = io.BytesIO()
+        with TextWriter(output) as writer:
+            assert writer.write_phrases(iter(phrases), Parser.create_text([]), max_phrases_per_text) == len(phrases)
+
+        assert output.getvalue() == TParser.write(texts)
+
+
+def test_text_writer_leaves_no_output_on_failure(tmpdir):
+    phrases = list(Parser.iter_phrases(pos_file_name))
+
+    def failing_phrases():
+        yield phrases[0]
+        raise ValueError("Broken input")
+
+    file_out = tmpdir.join('out.xml')
+    file_out.write_binary(b'previous output')
+    try:
+        with TextWriter(str(file_out)) as writer:
+            writer.write_phrases(failing_phrases(), Parser.create_text([]))
+    except ValueError:
+        pass
+
+    assert file_out.read_binary() == b'previous output'
+    assert tmpdir.listdir() == [file_out]
+
+    output = io.BytesIO()
+    try:
+        with TextWriter(output) as writer:
+            writer.write_phrases(failing_phrases(), Parser.create_text([]))
+    except ValueError:
+        pass
+
+    assert not output.getvalue().endswith(b'</typecraft>')
+
+
+def test_text_writer_replaces_output_on_success(tmpdir):
+    texts = Parser.parse_file(pos_file_name)
+    file_out = tmpdir.join('out.xml')
+    file_out.write_binary(b'previous output')
+    with TextWriter(str(file_out)) as writer:
+        for text in texts:
+            writer.write_text(text)
+
+    assert file_out.read_binary() == TParser.write(texts)
+    assert tmpdir.listdir() == [file_out]
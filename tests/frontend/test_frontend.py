@@ -1,3 +1,4 @@
+import os
 import re
 import pytest
 
@@ -9,3 +10,119 @@ def test_load():
     assert file_1 is not None
 
 
+def test_batch(tmpdir):
+    from click.testing import CliRunner
+    from norsourceparser.frontend import main
+
+    resources = os.path.join(os.path.dirname(__file__), '../resources')
+    output_dir = str(tmpdir.join('out'))
+
+    result = CliRunner().invoke(main, ['batch', resources, output_dir, '--workers', '2'])
+    assert result.exit_code == 0
+    assert sorted(os.listdir(output_dir)) == sorted(os.listdir(resources))
+
+    result = CliRunner().invoke(main, ['batch', resources, output_dir])
+    assert result.exit_code == 0
+    assert 'skipped 4' in result.output
+
+
+def test_batch_refuses_to_overwrite_input(tmpdir):
+    from click.testing import CliRunner
+    from norsourceparser.frontend import main
+
+    with open(os.path.join(os.path.dirname(__file__), '../resources/norsource_1.xml'), 'rb') as fp:
+        document = fp.read()
+    tmpdir.join('a.xml').write_binary(document)
+
+    result = CliRunner().invoke(main, ['batch', str(tmpdir), str(tmpdir), '--force'])
+    assert result.exit_code != 0
+    assert 'would overwrite the input file' in result.output
+    assert tmpdir.join('a.xml').read_binary() == document
+
+
+def test_batch_refuses_output_collisions(tmpdir):
+    import gzip
+    from click.testing import CliRunner
+    from norsourceparser.frontend import main
+
+    with open(os.path.join(os.path.dirname(__file__), '../resources/norsource_1.xml'), 'rb') as fp:
+        document = fp.read()
+    tmpdir.mkdir('in').join('a.xml').write_binary(document)
+    with gzip.open(str(tmpdir.join('in', 'a.xml.gz')), 'wb') as fp:
+        fp.write(document)
+
+    result = CliRunner().invoke(main, ['batch', str(tmpdir.join('in')), str(tmpdir.join('out'))])
+    assert result.exit_code != 0
+    assert 'would all be written to' in result.output
+    assert not tmpdir.join('out').check()
+
+
+def test_batch_failure_keeps_previous_output(tmpdir):
+    from click.testing import CliRunner
+    from norsourceparser.frontend import main
+
+    tmpdir.mkdir('in').join('a.xml').write_binary(b'<norsource><parse>')
+    tmpdir.mkdir('out').join('a.xml').write_binary(b'previous output')
+
+    result = CliRunner().invoke(main, ['batch', str(tmpdir.join('in')), str(tmpdir.join('out')), '--force',
+                                       '--workers', '1'])
+    assert result.exit_code == 1
+    assert tmpdir.join('out', 'a.xml').read_binary() == b'previous output'
+    assert tmpdir.join('out').listdir() == [tmpdir.join('out', 'a.xml')]
+
+
+def test_convert_without_sub_command(tmpdir):
+    from click.testing import CliRunner
+    from norsourceparser.frontend import main
+
+    file_in = os.path.join(os.path.dirname(__file__), '../resources/norsource_1.xml')
+    file_out = str(tmpdir.join('out.xml'))
+
+    result = CliRunner().invoke(main, [file_in, file_out])
+    assert result.exit_code == 0
+    assert os.path.exists(file_out)
+
+
+def test_convert_snapshot(tmpdir):
+    from click.testing import CliRunner
+    from norsourceparser.frontend import main
+
+    file_in = os.path.join(os.path.dirname(__file__), '../resources/norsource_2.xml')
+    snapshot = str(tmpdir.join('norsource.snap'))
+
+    result = CliRunner().invoke(main, ['snapshot', file_in, snapshot])
+    assert result.exit_code == 0
+
+    result = CliRunner().invoke(main, ['convert', snapshot, str(tmpdir.join('from_snapshot.xml'))])
+    assert result.exit_code == 0
+    result = CliRunner().invoke(main, ['convert', file_in, str(tmpdir.join('from_xml.xml'))])
+    assert result.exit_code == 0
+
+    assert tmpdir.join('from_snapshot.xml').read_binary() == tmpdir.join('from_xml.xml').read_binary()
+
+
+def test_convert_with_resources_bundle(tmpdir):
+    # Resources are loaded once per process, so every conversion runs in a fresh interpreter
+    import subprocess
+    import sys
+
+    file_in = os.path.join(os.path.dirname(__file__), '../resources/norsource_2.xml')
+    command = [sys.executable, '-c', 'from norsourceparser.frontend import main; main()']
+    environment = dict(os.environ, PYTHONPATH=os.path.join(os.path.dirname(__file__), '../..'))
+
+    def run(*args):
+        return subprocess.run(command + list(args), env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    bundle = str(tmpdir.join('resources.bundle'))
+    assert run('compile-resources', '--output', bundle).returncode == 0
+
+    result = run('convert', '--resources-bundle', bundle, file_in, str(tmpdir.join('from_bundle.xml')))
+    assert result.returncode == 0
+    assert b'Warning' not in result.stderr
+
+    result = run('convert', '--resources-bundle', str(tmpdir.join('missing.bundle')), file_in,
+                 str(tmpdir.join('from_json.xml')))
+    assert result.returncode == 0
+    assert b'missing or stale' in result.stderr
+
+    assert tmpdir.join('from_bundle.xml').read_binary() == tmpdir.join('from_json.xml').read_binary()
@@ -0,0 +1,33 @@
+from norsourceparser import client
+from norsourceparser.server import create_server
+from typecraft_python.parsing.parser import Parser as TParser
+from norsourceparser.core.parser import Parser
+import os
+import threading
+import pytest
+
+pos_file_name = os.path.join(os.path.dirname(__file__), '../resources/norsource_pos.xml')
+
+
+@pytest.fixture
+def socket_path(tmpdir):
+    path = str(tmpdir.join('norsourceparser.sock'))
+    server = create_server(socket_path=path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+
+
+def test_convert(socket_path):
+    with open(pos_file_name, 'rb') as fp:
+        result = client.convert(fp.read(), socket_path=socket_path)
+
+    assert result == TParser.write(Parser.parse_file(pos_file_name))
+
+
+def test_convert_invalid_document(socket_path):
+    with pytest.raises(client.ConversionError):
+        client.convert(b'<parse>', socket_path=socket_path)